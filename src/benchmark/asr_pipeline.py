@@ -0,0 +1,84 @@
+### --- Micro-benchmark: per-call overhead of the ASR pipeline (rebuilt vs cached) --- ###
+# Usage : python src/benchmark/asr_pipeline.py [model_id] [nb_calls]
+# Runs on CPU with a 3 seconds window (the live mode window size).
+
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from dotenv import load_dotenv
+from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.transcribe import get_asr_pipeline, run_asr
+
+load_dotenv()
+
+model_id = sys.argv[1] if len(sys.argv) > 1 else os.getenv("AUDIO_MODEL_NAME", "openai/whisper-tiny")
+nb_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+device = "cpu"
+torch_dtype = torch.float32
+
+model = AutoModelForSpeechSeq2Seq.from_pretrained(model_id, torch_dtype=torch_dtype, cache_dir=os.getenv("MODEL_DIR"))
+processor = AutoProcessor.from_pretrained(model_id)
+
+rng = np.random.default_rng(0)
+audio = (rng.standard_normal(16000 * 3) * 0.01).astype(np.float32)
+
+
+def rebuilt_call():
+    """Previous behaviour: a new pipeline for every window."""
+    pipe = pipeline(
+        "automatic-speech-recognition",
+        model=model,
+        tokenizer=processor.tokenizer,
+        feature_extractor=processor.feature_extractor,
+        chunk_length_s=30,
+        batch_size=16,
+        torch_dtype=torch_dtype,
+        device=device,
+    )
+    return run_asr(pipe, audio)
+
+
+def cached_call():
+    """Current behaviour: the pipeline is built once and reused."""
+    pipe = get_asr_pipeline(model, processor, torch_dtype, device)
+    return run_asr(pipe, audio)
+
+
+def bench(function):
+    function()  # warm-up
+    timings = []
+    for _ in range(nb_calls):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings), np.mean(timings)
+
+
+construction = []
+for _ in range(nb_calls):
+    start = time.perf_counter()
+    pipeline(
+        "automatic-speech-recognition",
+        model=model,
+        tokenizer=processor.tokenizer,
+        feature_extractor=processor.feature_extractor,
+        chunk_length_s=30,
+        batch_size=16,
+        torch_dtype=torch_dtype,
+        device=device,
+    )
+    construction.append(time.perf_counter() - start)
+
+rebuilt_median, rebuilt_mean = bench(rebuilt_call)
+cached_median, cached_mean = bench(cached_call)
+
+print(f"model: {model_id} - device: {device} - {nb_calls} calls on 3s of audio")
+print(f"pipeline construction only : median {np.median(construction) * 1000:8.1f} ms")
+print(f"rebuilt pipeline per call  : median {rebuilt_median * 1000:8.1f} ms  mean {rebuilt_mean * 1000:8.1f} ms")
+print(f"cached pipeline per call   : median {cached_median * 1000:8.1f} ms  mean {cached_mean * 1000:8.1f} ms")
+print(f"overhead removed per call  : {(rebuilt_median - cached_median) * 1000:8.1f} ms")
@@ -0,0 +1,50 @@
+### --- Micro-benchmark: per-segment cost of process_audio_for_whisper --- ###
+# Usage : python src/benchmark/resampling.py [segment_seconds] [nb_segments]
+# Compares the previous implementation (librosa.resample + separate passes)
+# with the cached polyphase filter and the float32 in-place normalisation.
+
+import os
+import sys
+import time
+
+import numpy as np
+from librosa import resample
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services import process_audio_for_whisper
+
+segment_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 4.0
+nb_segments = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+
+def previous_process(waveform, sample_rate):
+    """Previous behaviour of process_audio_for_whisper."""
+    if waveform.ndim > 1:
+        waveform = np.mean(waveform, axis=0)
+    if sample_rate != 16000:
+        waveform = resample(waveform, orig_sr=sample_rate, target_sr=16000)
+    waveform = waveform.astype(np.float32)
+    return waveform / np.max(np.abs(waveform))
+
+
+def bench(function, segments, sample_rate):
+    function(segments[0], sample_rate)  # warm-up (filter design, caches)
+    start = time.perf_counter()
+    for segment in segments:
+        function(segment, sample_rate)
+    return (time.perf_counter() - start) / len(segments)
+
+
+rng = np.random.default_rng(0)
+print(f"{nb_segments} segments of {segment_seconds:.1f}s")
+for sample_rate, channels in [(44100, 2), (48000, 1), (22050, 1), (16000, 2)]:
+    segments = [
+        rng.standard_normal((channels, int(segment_seconds * sample_rate))).astype(np.float32).squeeze()
+        for _ in range(nb_segments)
+    ]
+    before = bench(previous_process, segments, sample_rate)
+    after = bench(process_audio_for_whisper, segments, sample_rate)
+    print(
+        f"{sample_rate:>6} Hz x{channels} : librosa {before * 1000:8.2f} ms/segment"
+        f" - polyphase {after * 1000:8.2f} ms/segment (x{before / after:.1f})"
+    )
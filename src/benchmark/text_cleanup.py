@@ -0,0 +1,58 @@
+### --- Micro-benchmark: overlap removal between consecutive live transcriptions --- ###
+# Usage : python src/benchmark/text_cleanup.py [words_per_segment] [nb_segments]
+# Compares the previous cleanup_text (quadratic overlap search on list slices)
+# with TextCleaner (KMP overlap on the cached tokens of the previous segment).
+
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from live.text_cleanup import TextCleaner
+
+words_per_segment = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+nb_segments = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+
+def previous_cleanup_text(previous_text, new_text):
+    """Previous behaviour of cleanup_text."""
+    if not previous_text:
+        return new_text
+    prev_clean = re.sub(r"[^\w\s]", "", previous_text).lower().split()
+    new_clean = re.sub(r"[^\w\s]", "", new_text).lower().split()
+    overlap = 0
+    for i in range(1, min(len(prev_clean), len(new_clean)) + 1):
+        if prev_clean[-i:] == new_clean[:i]:
+            overlap = i
+    cleaned_text = " ".join(new_text.split()[overlap:])
+    cleaned_text = re.sub(r"\b(\w+)\s+\1\b", r"\1", cleaned_text, flags=re.IGNORECASE)
+    cleaned_text = re.sub(r"(\b\w+\s+\w+\b)\s+\1", r"\1", cleaned_text, flags=re.IGNORECASE)
+    return re.sub(r"\s+", " ", cleaned_text).strip()
+
+
+# Consecutive segments repeat the second half of the previous one, like overlapping windows
+rng = np.random.default_rng(0)
+vocabulary = [f"mot{i}" for i in range(300)] + ["la", "le", "de", "et", "réunion,", "projet."]
+stream = [vocabulary[i] for i in rng.integers(0, len(vocabulary), words_per_segment * nb_segments)]
+step = words_per_segment // 2
+segments = [" ".join(stream[i:i + words_per_segment]) for i in range(0, step * nb_segments, step)]
+
+start = time.perf_counter()
+previous, before_texts = "", []
+for segment in segments:
+    before_texts.append(previous_cleanup_text(previous, segment))
+    previous = segment
+before = (time.perf_counter() - start) / len(segments)
+
+start = time.perf_counter()
+cleaner = TextCleaner()
+after_texts = [cleaner.clean(segment) for segment in segments]
+after = (time.perf_counter() - start) / len(segments)
+
+print(f"{nb_segments} segments of {words_per_segment} words")
+print(f"previous cleanup_text : {before * 1000:8.2f} ms/segment")
+print(f"TextCleaner           : {after * 1000:8.2f} ms/segment (x{before / after:.1f})")
+print(f"identical output      : {before_texts == after_texts}")
@@ -1,5 +1,6 @@
-from .model_loader import load_model, load_pyannote
-from .transcribe import do_transcription
+from .model_loader import load_model, load_pyannote, use_model, use_pyannote
+from .model_registry import model_registry
+from .transcribe import do_transcription, shift_timestamps, transcribe_batch, transcribe_words
 from .translate import translate_text
 
-__all__ = ["load_model", "do_transcription","load_pyannote","translate_text"]
+__all__ = ["load_model", "do_transcription","load_pyannote","translate_text","model_registry","transcribe_batch","transcribe_words","shift_timestamps","use_model","use_pyannote"]
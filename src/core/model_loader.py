@@ -1,4 +1,5 @@
 import os, sys
+from contextlib import contextmanager
 from pyannote.audio import Audio, Pipeline
 import torch
 from langchain_ollama import OllamaLLM
@@ -7,42 +8,52 @@ from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from services import logger
 from config import config
+from .model_registry import model_registry
 
 MODEL_DIR = os.getenv("MODEL_DIR")
 HF_TOKEN = os.getenv("HF_TOKEN")
+PYANNOTE_MODEL = "pyannote/speaker-diarization-3.1"
 
-def load_model():
+def detect_device():
     """
-    This function loads the AUDIO_MODEL.
+    Detects the available device and the matching dtype.
     Returns:
-        model: the transcription model
-        processor: the processor for the model
+        device: detected device (CPU/GPU)
+        torch_dtype: dtype depending on GPU usage
+    """
+    if torch.backends.mps.is_available():  # Apple Silicon GPU
+        logger.debug("Apple Silicon GPU detected (MPS mode).")
+        return "mps", torch.float16
+    if torch.cuda.is_available():  # CUDA GPU
+        logger.debug("CUDA GPU detected.")
+        return "cuda:0", torch.float16
+    logger.debug("No GPU detected, using CPU.")
+    return "cpu", torch.float32
+
+
+def audio_model_entry():
+    """
+    Returns the registry key and the loader of the AUDIO_MODEL for the detected device.
+    Returns:
+        key: (model id, device, dtype) key of the model in the registry
+        loader: function loading (model, processor)
         torch_dtype: dtype depending on GPU usage
         device: detected device (CPU/GPU)
     """
-    try:
-        # Detects the device and sets the appropriate dtype
-        if torch.backends.mps.is_available():  # Apple Silicon GPU
-            device = "mps"
-            torch_dtype = torch.float16
-            logger.info("Apple Silicon GPU detected (MPS mode).")
-        elif torch.cuda.is_available():  # CUDA GPU
-            device = "cuda:0"
-            torch_dtype = torch.float16
-            logger.info("CUDA GPU detected.")
-        else:
-            device = "cpu"
-            torch_dtype = torch.float32
-            logger.warning("No GPU detected, using CPU. Performance may be affected.")
-
-        logger.debug(f"Device selected: {device}, dtype: {torch_dtype}")
-
-        # Loading the model
-        model_id = os.getenv("AUDIO_MODEL_NAME")
-        if not model_id:
-            logger.error("AUDIO_MODEL_NAME environment variable is not set.")
-            raise ValueError("AUDIO_MODEL_NAME is not set in environment variables.")
+    # Detects the device and sets the appropriate dtype
+    device, torch_dtype = detect_device()
+    if device == "cpu":
+        logger.warning("No GPU detected, using CPU. Performance may be affected.")
+
+    logger.debug(f"Device selected: {device}, dtype: {torch_dtype}")
+
+    # Loading the model
+    model_id = os.getenv("AUDIO_MODEL_NAME")
+    if not model_id:
+        logger.error("AUDIO_MODEL_NAME environment variable is not set.")
+        raise ValueError("AUDIO_MODEL_NAME is not set in environment variables.")
 
+    def loader():
         logger.info(f"Loading audio model: {model_id}")
 
         model = AutoModelForSpeechSeq2Seq.from_pretrained(
@@ -57,6 +68,26 @@ def load_model():
         # loading processor
         processor = AutoProcessor.from_pretrained(model_id)
         logger.info("Processor loaded successfully.")
+        return model, processor
+
+    return (model_id, device, str(torch_dtype)), loader, torch_dtype, device
+
+
+def load_model():
+    """
+    This function loads the AUDIO_MODEL.
+    The model is shared through the model registry, so it is only loaded once per
+    (model id, device, dtype) for the whole process. Use use_model() instead to keep it
+    resident (not evicted by the registry budget) while transcribing.
+    Returns:
+        model: the transcription model
+        processor: the processor for the model
+        torch_dtype: dtype depending on GPU usage
+        device: detected device (CPU/GPU)
+    """
+    try:
+        key, loader, torch_dtype, device = audio_model_entry()
+        model, processor = model_registry.get(key, loader)
 
         return model, processor, torch_dtype, device
 
@@ -64,6 +95,24 @@ def load_model():
         logger.error(f"Error loading audio model: {e}", exc_info=True)
         raise
 
+
+@contextmanager
+def use_model():
+    """
+    Context manager loading the AUDIO_MODEL and marking it as in use in the model registry,
+    so it cannot be evicted while the block runs.
+    Yields:
+        (model, processor, torch_dtype, device), as returned by load_model()
+    """
+    try:
+        key, loader, torch_dtype, device = audio_model_entry()
+    except Exception as e:
+        logger.error(f"Error loading audio model: {e}", exc_info=True)
+        raise
+
+    with model_registry.checkout(key, loader) as (model, processor):
+        yield model, processor, torch_dtype, device
+
 def load_ollama_model():
     """
     This function loads the OLLAMA_MODEL (LLM).
@@ -94,19 +143,37 @@ def load_pyannote():
     This function checks for the availability of MPS (Metal Performance Shaders) and CUDA
     (Compute Unified Device Architecture) to determine the device to be used for running
     the PyAnnote pipeline. If neither is available, it defaults to using the CPU.
+    The pipeline is shared through the model registry.
 
     Returns:
         Pipeline: The PyAnnote speaker diarization pipeline loaded on the appropriate device.
     """
-    if torch.backends.mps.is_available():
-        device = "mps"
-    elif torch.cuda.is_available():
-        device = "cuda:0"
-    else:
-        device = "cpu"
+    key, loader = pyannote_entry()
+    return model_registry.get(key, loader)
+
+
+def pyannote_entry():
+    """Returns the registry key and the loader of the PyAnnote pipeline for the detected device."""
+    device, _ = detect_device()
 
     logger.info(f"utilisation of the device : {device}")
 
-    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1", cache_dir=MODEL_DIR)
-    pipeline.to(torch.device(device))
-    return pipeline
\ No newline at end of file
+    def loader():
+        pipeline = Pipeline.from_pretrained(PYANNOTE_MODEL, cache_dir=MODEL_DIR)
+        pipeline.to(torch.device(device))
+        return pipeline
+
+    return (PYANNOTE_MODEL, device, "float32"), loader
+
+
+@contextmanager
+def use_pyannote():
+    """
+    Context manager loading the PyAnnote pipeline and marking it as in use in the model
+    registry, so it cannot be evicted while the block runs.
+    Yields:
+        Pipeline: The PyAnnote speaker diarization pipeline.
+    """
+    key, loader = pyannote_entry()
+    with model_registry.checkout(key, loader) as pipeline:
+        yield pipeline
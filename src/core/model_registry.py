@@ -0,0 +1,209 @@
+import os, sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services import logger
+from config import config
+
+
+def estimate_size(handle):
+    """
+    Estimates the memory footprint (in bytes) of a loaded model handle.
+
+    The handle can be a torch module, an object exposing ``parameters()``
+    (e.g. a pyannote pipeline) or a tuple/list containing such objects.
+
+    Args:
+        handle: The loaded model handle.
+
+    Returns:
+        int: Estimated size in bytes (0 if it cannot be estimated).
+    """
+    if isinstance(handle, (tuple, list)):
+        return sum(estimate_size(item) for item in handle)
+
+    parameters = getattr(handle, "parameters", None)
+    if not callable(parameters):
+        return 0
+
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """Process-wide registry of loaded models.
+
+    Models are stored under a key (model id, device, dtype) and handed out as shared,
+    already-loaded handles. The least recently used models are evicted when the number
+    of entries or the estimated memory exceeds the configured budget. Only idle models are
+    evicted: a model checked out with checkout() (or acquire()) is kept until it is released.
+
+    Attributes:
+        max_bytes (int): Memory budget in bytes (0 means unlimited).
+        max_entries (int): Maximum number of resident models (0 means unlimited).
+
+    Methods:
+        get(key, loader): Returns the cached handle for key, loading it with loader() on a miss.
+        checkout(key, loader): Context manager returning the handle and keeping it resident while in use.
+        acquire(key, loader) / release(key): Marks a model as in use / idle again.
+        evict(key): Removes a model from the registry.
+        clear(): Removes every model from the registry.
+        add_eviction_listener(listener): Registers a callback called with (key, handle) on eviction.
+        get_stats(): Returns hit/miss/eviction counters and the cumulated load time.
+    """
+
+    def __init__(self, max_bytes=0, max_entries=0):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (handle, size)
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self._listeners = []
+        self._in_use = {}  # key -> number of users holding the model
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "load_time": 0.0}
+
+    def get(self, key, loader, acquire=False):
+        """
+        Returns the handle stored under key, loading it on a miss.
+
+        Args:
+            key (tuple): (model id, device, dtype) identifying the model.
+            loader (callable): Function without argument returning the loaded handle.
+            acquire (bool, optional): Marks the model as in use (see release). Defaults to False.
+
+        Returns:
+            The shared model handle.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                if acquire:
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                logger.debug(f"Model registry hit: {key}")
+                return self._entries[key][0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given key, the others wait and then hit
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    if acquire:
+                        self._in_use[key] = self._in_use.get(key, 0) + 1
+                    return self._entries[key][0]
+                self._stats["misses"] += 1
+
+            start_time = time.time()
+            handle = loader()
+            load_time = time.time() - start_time
+            size = estimate_size(handle)
+
+            with self._lock:
+                self._stats["load_time"] += load_time
+                self._entries[key] = (handle, size)
+                self._key_locks.pop(key, None)
+                if acquire:
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+            logger.info(f"Model {key} loaded in {load_time:.2f} seconds ({size / 1e6:.0f} MB)")
+
+        self._enforce_budget(keep=key)
+        return handle
+
+    def acquire(self, key, loader):
+        """Returns the handle stored under key (loading it on a miss) and marks it as in use."""
+        return self.get(key, loader, acquire=True)
+
+    def release(self, key):
+        """Marks a model returned by acquire as idle again, it can then be evicted."""
+        with self._lock:
+            count = self._in_use.get(key, 0) - 1
+            if count > 0:
+                self._in_use[key] = count
+            else:
+                self._in_use.pop(key, None)
+        # The budget may have been exceeded while the model was in use
+        self._enforce_budget(keep=None)
+
+    @contextmanager
+    def checkout(self, key, loader):
+        """
+        Context manager keeping a model resident while it is used.
+
+        Args:
+            key (tuple): (model id, device, dtype) identifying the model.
+            loader (callable): Function without argument returning the loaded handle.
+
+        Yields:
+            The shared model handle.
+        """
+        handle = self.acquire(key, loader)
+        try:
+            yield handle
+        finally:
+            self.release(key)
+
+    def evict(self, key, only_idle=False):
+        """Removes the model stored under key (unless in use with only_idle) and notifies the listeners."""
+        with self._lock:
+            if only_idle and self._in_use.get(key):
+                return
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            self._stats["evictions"] += 1
+            listeners = list(self._listeners)
+
+        logger.info(f"Model evicted from registry: {key}")
+        for listener in listeners:
+            try:
+                listener(key, entry[0])
+            except Exception as e:
+                logger.error(f"Error in model eviction listener: {e}", exc_info=True)
+
+    def clear(self):
+        """Removes every model from the registry."""
+        with self._lock:
+            keys = list(self._entries)
+        for key in keys:
+            self.evict(key)
+
+    def add_eviction_listener(self, listener):
+        """Registers a callback called with (key, handle) when a model is evicted."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def get_stats(self):
+        """Returns the registry counters and the resident models."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = list(self._entries)
+            stats["in_use"] = dict(self._in_use)
+            stats["resident_bytes"] = sum(size for _, size in self._entries.values())
+        return stats
+
+    def _enforce_budget(self, keep):
+        """Evicts the least recently used idle models until the budget is respected."""
+        while True:
+            with self._lock:
+                over_entries = self.max_entries and len(self._entries) > self.max_entries
+                resident = sum(size for _, size in self._entries.values())
+                over_bytes = self.max_bytes and resident > self.max_bytes
+                candidates = [key for key in self._entries if key != keep and not self._in_use.get(key)]
+                if not (over_entries or over_bytes) or not candidates:
+                    return
+                oldest = candidates[0]
+            self.evict(oldest, only_idle=True)
+
+
+# Global instance
+model_registry = ModelRegistry(
+    max_bytes=int(float(config.get("model_registry_max_gb", 0)) * 1024**3),
+    max_entries=int(config.get("model_registry_max_models", 0)),
+)
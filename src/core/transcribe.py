@@ -1,15 +1,219 @@
 import os, sys
+import threading
 from transformers import pipeline
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from services import write_in_output_formated, logger
+from .model_registry import model_registry
+
+known_false_positive = [" Sous-titrage Société Radio-Canada", " Merci.", " Thank you."," Bye."," ん"]
+
+# ASR pipelines already built, keyed by (model, chunk_length_s, batch_size, device)
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def _drop_pipelines(key, handle):
+    """Drops the pipelines built on top of a model evicted from the registry."""
+    if not isinstance(handle, tuple):
+        return
+    with _pipelines_lock:
+        for pipeline_key in [k for k, pipe in _pipelines.items() if pipe.model is handle[0]]:
+            del _pipelines[pipeline_key]
+
+
+model_registry.add_eviction_listener(_drop_pipelines)
+
+
+def get_asr_pipeline(model, processor, torch_dtype, device, chunk_length_s=30, batch_size=16):
+    """
+    Returns the ASR pipeline for the given model, building it only on the first call.
+
+    Args:
+        model : Pre-trained ASR model
+        processor : Processor for feature extraction and tokenization
+        torch_dtype : Data type (depends on GPU/CPU configuration)
+        device : CPU or GPU
+        chunk_length_s (int): Length of the chunks in seconds. Defaults to 30.
+        batch_size (int): Number of chunks per forward pass. Defaults to 16.
+
+    Returns:
+        Pipeline: The shared "automatic-speech-recognition" pipeline.
+    """
+    key = (id(model), chunk_length_s, batch_size, str(device))
+    with _pipelines_lock:
+        pipe = _pipelines.get(key)
+        if pipe is None:
+            logger.debug(f"Pipeline parameters - dtype: {torch_dtype}, chunk length: {chunk_length_s}s")
+            pipe = pipeline(
+                "automatic-speech-recognition",
+                model=model,
+                tokenizer=processor.tokenizer,
+                feature_extractor=processor.feature_extractor,
+                chunk_length_s=chunk_length_s,
+                batch_size=batch_size,
+                torch_dtype=torch_dtype,
+                device=device
+            )
+            _pipelines[key] = pipe
+            logger.info("ASR pipeline initialized successfully.")
+    return pipe
+
+
+def run_asr(pipe, audio, lang_code="", chunk_length_s=30, return_timestamps=True):
+    """
+    Runs the inference only, on an already built ASR pipeline.
+
+    Args:
+        pipe : ASR pipeline returned by get_asr_pipeline
+        audio : Audio data (16kHz float32)
+        lang_code (str): Language code, empty for automatic detection
+        chunk_length_s (int): Length of the chunks in seconds. Defaults to 30.
+        return_timestamps (bool or str): True for segment timestamps, "word" for word timestamps.
+
+    Returns:
+        dict: The pipeline result, None if empty or a known false positive.
+    """
+    kwargs = {}
+    if lang_code != "":
+        kwargs["generate_kwargs"] = {"language": lang_code}
+
+    # Conversion en texte
+    result = pipe(
+        {"raw": audio, "sampling_rate": 16000},
+        return_timestamps=return_timestamps,
+        chunk_length_s=chunk_length_s,
+        **kwargs
+    )
+    return _check_result(result)
+
+
+def shift_timestamps(result, offset, duration):
+    """
+    Moves the chunk timestamps of a result onto the timeline of the original recording.
+
+    Args:
+        result (dict): Pipeline result with "chunks"
+        offset (float): Position of the transcribed audio in the recording, in seconds
+        duration (float): Duration of the transcribed audio, used when the last end is unknown
+
+    Returns:
+        dict: The result, modified in place.
+    """
+    for chunk in result.get("chunks", []):
+        start, end = chunk["timestamp"]
+        if end is None:
+            end = duration
+        chunk["timestamp"] = (start + offset, end + offset)
+    return result
+
+
+def _check_result(result):
+    """Returns the result, or None if it is empty or a known false positive."""
+    if not result or "text" not in result:
+        logger.warning("Transcription result is empty or missing 'text' field.")
+        return None
+
+    # Vérification des faux positifs connus avec Whisper-V3-Turbo
+    if result["text"] in known_false_positive:
+        logger.warning("Ignoring result due to known false positive.")
+        return None
+
+    return result
+
+
+def transcribe_words(audio, model, processor, torch_dtype, device, lang_code=""):
+    """
+    Transcribes a whole audio with word-level timestamps.
+
+    Args:
+        audio : Audio data (16kHz float32)
+        model : Pre-trained ASR model
+        processor : Processor for feature extraction and tokenization
+        torch_dtype : Data type (depends on GPU/CPU configuration)
+        device : CPU or GPU
+        lang_code (str): Language code, empty for automatic detection
+
+    Returns:
+        dict: The pipeline result whose "chunks" are words with their (start, end) timestamps,
+        None if the transcription failed.
+    """
+    try:
+        logger.info(f"Starting word-level transcription ( device: {device})")
+        pipe = get_asr_pipeline(model, processor, torch_dtype, device)
+        return run_asr(pipe, audio, lang_code, return_timestamps="word")
+
+    except Exception as e:
+        logger.error(f"Error during word-level transcription: {e}", exc_info=True)
+        return None
+
+
+def transcribe_batch(waveforms,
+                     model,
+                     processor,
+                     torch_dtype,
+                     device,
+                     lang_code="",
+                     batch_size=8
+                     ):
+    """
+    Transcribes a list of waveforms with batched forward passes.
+
+    The waveforms are sorted by length so that each batch holds segments of similar
+    duration (less padding), sent to Whisper in fixed-size batches, and the results
+    are returned in the input order.
+
+    Args:
+        waveforms (list): Audio data (16kHz float32 numpy arrays)
+        model : Pre-trained ASR model
+        processor : Processor for feature extraction and tokenization
+        torch_dtype : Data type (depends on GPU/CPU configuration)
+        device : CPU or GPU
+        lang_code (str): Language code, empty for automatic detection
+        batch_size (int): Number of segments per forward pass. Defaults to 8.
+
+    Returns:
+        list: One result per waveform (None if empty or a known false positive).
+    """
+    results = [None] * len(waveforms)
+    if not waveforms:
+        return results
+
+    pipe = get_asr_pipeline(model, processor, torch_dtype, device, batch_size=batch_size)
+
+    kwargs = {}
+    if lang_code != "":
+        kwargs["generate_kwargs"] = {"language": lang_code}
+
+    # Longest first, so that each batch is padded as little as possible
+    order = sorted(range(len(waveforms)), key=lambda i: len(waveforms[i]), reverse=True)
+    logger.info(f"Batched transcription of {len(waveforms)} segments (batch size: {batch_size})")
+
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        try:
+            outputs = pipe(
+                [{"raw": waveforms[i], "sampling_rate": 16000} for i in indices],
+                return_timestamps=True,
+                chunk_length_s=30,
+                batch_size=batch_size,
+                **kwargs
+            )
+            for i, result in zip(indices, outputs):
+                results[i] = _check_result(result)
+        except Exception as e:
+            logger.error(f"Error during batched transcription: {e}", exc_info=True)
+
+    return results
+
 
 def do_transcription(audio,
                      model,
                      processor,
                      torch_dtype, 
                      device, 
-                     output_file,lang_code=""
+                     output_file,lang_code="",
+                     time_offset=0.0
                      ):
     """
     This function takes an audio input and outputs the transcription inside the output_file.
@@ -22,56 +226,27 @@ def do_transcription(audio,
         device : CPU or GPU
         output_file : File to store the transcription
         mode : "transcribe" (default) or "translate"
+        time_offset (float): Position of the audio in the original recording, added to the timestamps
 
     Returns:
         Writes the transcription inside the output file and returns the result.
     """
-    
-    known_false_positive = [" Sous-titrage Société Radio-Canada", " Merci.", " Thank you."," Bye."," ん"]
-    
     try:
         logger.info(f"Starting transcription ( device: {device})")
 
-        # Débogage des paramètres
-        logger.debug(f"Pipeline parameters - dtype: {torch_dtype}, chunk length: 30s")
-
-        # Initialisation du pipeline ASR
-        pipe = pipeline(
-            "automatic-speech-recognition",
-            model=model,
-            tokenizer=processor.tokenizer,
-            feature_extractor=processor.feature_extractor,
-            chunk_length_s=30,
-            batch_size=16,
-            torch_dtype=torch_dtype,
-            device=device
-        )
-        logger.info("ASR pipeline initialized successfully.")
-        
-        kwargs = {}
-        if lang_code != "":
-            kwargs["generate_kwargs"] = {"language": lang_code}
-            
-        # Conversion en texte
-        result = pipe(
-            {"raw": audio, "sampling_rate": 16000},
-            return_timestamps=True,
-            chunk_length_s=30,
-            **kwargs
-        )
-
-        if not result or "text" not in result:
-            logger.warning("Transcription result is empty or missing 'text' field.")
-            return None
+        # Pipeline ASR partagé (construit une seule fois)
+        pipe = get_asr_pipeline(model, processor, torch_dtype, device)
 
-        # Vérification des faux positifs connus avec Whisper-V3-Turbo
-        if result["text"] in known_false_positive:
-            logger.warning("Ignoring result due to known false positive.")
+        result = run_asr(pipe, audio, lang_code)
+        if result is None:
             return None
 
         logger.info("Transcription completed successfully.")
         logger.debug(f"Transcription result: {result['text']}")
 
+        if time_offset:
+            shift_timestamps(result, time_offset, len(audio) / 16000)
+
         # Écriture du résultat dans le fichier de sortie
         write_in_output_formated(result, output_file)
         logger.info(f"Transcription saved to {output_file}")
@@ -3,6 +3,7 @@ import torch
 from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
 from langdetect import detect
 from services import logger
+from .model_registry import model_registry
 
 device = "mps" if torch.backends.mps.is_available() else "cpu"
 model_name = "facebook/m2m100_418M"
@@ -10,23 +11,42 @@ model_name = "facebook/m2m100_418M"
 MODEL_DIR = os.getenv("MODEL_DIR")
 torch_dtype = torch.float16
 
-tokenizer = M2M100Tokenizer.from_pretrained(model_name)
-model = M2M100ForConditionalGeneration.from_pretrained(model_name, cache_dir=MODEL_DIR, torch_dtype=torch_dtype)
-model.to(device)
+
+TRANSLATION_KEY = (model_name, device, str(torch_dtype))
+
+
+def _translation_loader():
+    tokenizer = M2M100Tokenizer.from_pretrained(model_name)
+    model = M2M100ForConditionalGeneration.from_pretrained(model_name, cache_dir=MODEL_DIR, torch_dtype=torch_dtype)
+    model.to(device)
+    return model, tokenizer
+
+
+def load_translation_model():
+    """
+    Loads the M2M100 translation model through the model registry.
+    Returns:
+        model: the translation model
+        tokenizer: the tokenizer for the model
+    """
+    return model_registry.get(TRANSLATION_KEY, _translation_loader)
+
 
 def translate_text(text, target_lang):
     try:
-        # Détection automatique de la langue source
-        src_lang = detect(text)
-        # Correction éventuelle des codes pour M2M100
-        lang_map = {'zh-cn': 'zh', 'zh-tw': 'zh'}
-        src_lang = lang_map.get(src_lang, src_lang)
-        
-        tokenizer.src_lang = src_lang
-        encoded_text = tokenizer(text, return_tensors="pt").to(device)
-        forced_bos_token_id = tokenizer.get_lang_id(target_lang)
-        generated_tokens = model.generate(**encoded_text, forced_bos_token_id=forced_bos_token_id)
-        return tokenizer.decode(generated_tokens[0], skip_special_tokens=True)
+        # Kept resident by the registry while translating
+        with model_registry.checkout(TRANSLATION_KEY, _translation_loader) as (model, tokenizer):
+            # Détection automatique de la langue source
+            src_lang = detect(text)
+            # Correction éventuelle des codes pour M2M100
+            lang_map = {'zh-cn': 'zh', 'zh-tw': 'zh'}
+            src_lang = lang_map.get(src_lang, src_lang)
+
+            tokenizer.src_lang = src_lang
+            encoded_text = tokenizer(text, return_tensors="pt").to(device)
+            forced_bos_token_id = tokenizer.get_lang_id(target_lang)
+            generated_tokens = model.generate(**encoded_text, forced_bos_token_id=forced_bos_token_id)
+            return tokenizer.decode(generated_tokens[0], skip_special_tokens=True)
     except Exception as e:
         logger.error(f"Error: Could not detect language or translate text ({e})")
         return text
@@ -1,84 +1,212 @@
 import os, sys
-from pyannote.audio import Audio
-from pyannote.core import Segment
-from pydub import AudioSegment
+from concurrent.futures import ThreadPoolExecutor
+import torch
 # import re
 # from langchain_ollama import OllamaLLM
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from core import do_transcription, load_model, load_pyannote
-from services import logger,process_audio_for_whisper,convert_audio_to_wav,save_transcriptions, cleanup_transcriptions, transcription_post_process
+from core import transcribe_batch, transcribe_words, use_model, use_pyannote
+from services import logger,process_audio_for_whisper,get_decoded_audio,save_transcriptions, cleanup_transcriptions, transcription_post_process
 from config import config
+from .diarization_cache import diarization_cache_key, load_cached_diarization, save_diarization
+from .turn_planner import plan_turns
 
 MODEL_DIR = os.path.abspath("../../models")
 os.makedirs(MODEL_DIR, exist_ok=True)
 
-def start_transcription_n_diarization(output_path,file_path,lang_code):
+SAMPLE_RATE = 16000
+
+def start_transcription_n_diarization(output_path,file_path,lang_code,mode=None):
     """
     This function transcribe an audio file and use diarization for Speaker separation
     Args:
         output_path: output path file 
         file_path : the file path
+        lang_code : language code of the audio
+        mode : "turns" transcribes each speaker turn on its own, "aligned" transcribes the whole
+               file once and aligns the words on the speaker turns (default: config "diarization_mode")
     Return:
         Path to the final txt file  
     """
-    pipeline = load_pyannote()
+    mode = mode or config.get("diarization_mode", "turns")
 
-    # loading the audio 
-    audio_file = convert_audio_to_wav(file_path)
-    audio = AudioSegment.from_wav(audio_file)
-    duration = len(audio) / 1000
+    # loading the audio once, from the decoded-audio cache (16kHz mono float32)
+    audio = get_decoded_audio(file_path, SAMPLE_RATE)
+    if audio is None:
+        raise ValueError(f"Unable to decode the audio file: {file_path}")
+    duration = len(audio) / SAMPLE_RATE
 
     # Logs 
     logger.info(f"Durée totale de l'audio : {duration:.2f} secondes")
-    logger.info("Exécution de la diarisation...")
-    
+
+    if mode == "aligned":
+        output_transcriptions = transcribe_aligned(audio, lang_code)
+    else:
+        output_transcriptions = transcribe_turns(audio, duration, lang_code)
+
+    return save_transcriptions(output_path,cleanup_transcriptions(output_transcriptions))
+
+
+def run_diarization(audio):
+    """
+    Runs the pyannote speaker diarization on the in-memory 16kHz mono waveform.
+    The result is cached on disk, keyed by the audio content, so the pipeline is
+    skipped entirely when the same audio is processed again.
+    """
+    key = diarization_cache_key(audio)
+    diarization = load_cached_diarization(key)
+    if diarization is not None:
+        return diarization
+
+    with use_pyannote() as pipeline:
+        logger.info("Exécution de la diarisation...")
+        diarization = pipeline({"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": SAMPLE_RATE})
+    save_diarization(key, diarization)
+    return diarization
+
+
+def transcribe_turns(audio, duration, lang_code):
+    """
+    Diarizes the audio, then transcribes each speaker turn on its own.
+    Args:
+        audio : 16kHz mono float32 waveform
+        duration : duration of the audio in seconds
+        lang_code : language code of the audio
+    Return:
+        list of segments {"speaker", "start", "end", "transcription"}
+    """
     # Start diarization
-    diarization = pipeline(audio_file)
+    diarization = run_diarization(audio)
 
-    audio_handler = Audio()
-    output_transcriptions = []
-    model, processor, torch_dtype, device = load_model()
-    
-    # for each speaker we do transcription with wisper V3 turbo
-    for turn, _, speaker in diarization.itertracks(yield_label=True):
-        segment_end = min(turn.end, duration)
-        
-        logger.debug(f"Vérification du segment : Speaker={speaker}, Start={turn.start:.2f}s, End={segment_end:.2f}s")
-        
-        if turn.start >= duration:
-            logger.warning(f"⚠️ Ignoré : Start {turn.start:.2f}s dépasse la durée {duration:.2f}s")
-            continue
+    segments = []
+    waveforms = []
 
-        if turn.start == segment_end:
-            logger.warning(f"⚠️ Ignoré : Start et End identiques ({turn.start:.2f}s)")
-            continue
+    # Merge / pad the speaker turns before any transcription
+    turns = [(turn.start, turn.end, speaker) for turn, _, speaker in diarization.itertracks(yield_label=True)]
+    planned_turns, _ = plan_turns(turns, duration)
+
+    # Collect the audio of each speaker turn
+    for turn in planned_turns:
+        speaker = turn["speaker"]
+        logger.debug(f"Vérification du segment : Speaker={speaker}, Start={turn['start']:.2f}s, End={turn['end']:.2f}s")
 
         try:
-            waveform, sample_rate = audio_handler.crop(audio_file, Segment(turn.start, segment_end))
+            # Zero-copy view on the decoded audio
+            waveform = audio[int(turn["audio_start"] * SAMPLE_RATE):int(turn["audio_end"] * SAMPLE_RATE)]
 
-            if waveform.numel() == 0:
-                logger.warning(f"Segment vide ! Speaker={speaker}, Start={turn.start:.2f}s, End={segment_end:.2f}s")
+            if waveform.size == 0:
+                logger.warning(f"Segment vide ! Speaker={speaker}, Start={turn['start']:.2f}s, End={turn['end']:.2f}s")
                 continue
 
-            waveform_np = process_audio_for_whisper(waveform, sample_rate)
+            waveform_np = process_audio_for_whisper(waveform, SAMPLE_RATE)
 
             if waveform_np is None:
                 continue
 
             logger.debug(f"Shape: {waveform_np.shape}, Min: {waveform_np.min()}, Max: {waveform_np.max()}")
 
-            transcription = do_transcription(waveform_np, model, processor, torch_dtype, device, "output.txt",lang_code=lang_code)
-
-            output_transcriptions.append({
-                "speaker": speaker,
-                "start": turn.start,
-                "end": turn.end,
-                "transcription": transcription["text"],
-            })
+            segments.append((speaker, turn["start"], turn["end"]))
+            waveforms.append(waveform_np)
         except Exception as e:
             logger.error(f"Error processing speaker segment: {e}", exc_info=True)
-            
-    return save_transcriptions(output_path,cleanup_transcriptions(output_transcriptions))
+
+    # for all the speakers we do a batched transcription with wisper V3 turbo
+    with use_model() as (model, processor, torch_dtype, device):
+        transcriptions = transcribe_batch(
+            waveforms, model, processor, torch_dtype, device,
+            lang_code=lang_code, batch_size=config.get("asr_batch_size", 8)
+        )
+
+    output_transcriptions = []
+    for (speaker, start, end), transcription in zip(segments, transcriptions):
+        if transcription is None:
+            continue
+        output_transcriptions.append({
+            "speaker": speaker,
+            "start": start,
+            "end": end,
+            "transcription": transcription["text"],
+        })
+
+    return output_transcriptions
+
+
+def transcribe_aligned(audio, lang_code):
+    """
+    Transcribes the whole audio once with word timestamps while pyannote runs in another
+    worker, then assigns each word to the speaker turn it overlaps.
+    Args:
+        audio : 16kHz mono float32 waveform
+        lang_code : language code of the audio
+    Return:
+        list of segments {"speaker", "start", "end", "transcription"}
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        diarization_future = executor.submit(run_diarization, audio)
+
+        waveform = process_audio_for_whisper(audio, SAMPLE_RATE)
+        with use_model() as (model, processor, torch_dtype, device):
+            result = transcribe_words(waveform, model, processor, torch_dtype, device, lang_code=lang_code)
+
+        diarization = diarization_future.result()
+
+    if result is None:
+        return []
+
+    turns = [(turn.start, turn.end, speaker) for turn, _, speaker in diarization.itertracks(yield_label=True)]
+    return assign_words_to_speakers(result.get("chunks", []), turns)
+
+
+def assign_words_to_speakers(words, turns):
+    """
+    Assigns each word to the speaker turn it overlaps the most, and groups consecutive
+    words of the same speaker into segments.
+    Args:
+        words : word chunks {"text", "timestamp": (start, end)} sorted by time
+        turns : speaker turns (start, end, speaker)
+    Return:
+        list of segments {"speaker", "start", "end", "transcription"}
+    """
+    turns = sorted(turns)
+    segments = []
+    if not turns:
+        return segments
+
+    first = 0
+    for word in words:
+        start, end = word["timestamp"]
+        if end is None:
+            end = start
+
+        # Turns are sorted: the ones ending before this word are never needed again
+        while first < len(turns) - 1 and turns[first][1] <= start:
+            first += 1
+
+        speaker, best_overlap = None, 0.0
+        i = first
+        while i < len(turns) and turns[i][0] <= end:
+            overlap = min(end, turns[i][1]) - max(start, turns[i][0])
+            if speaker is None or overlap > best_overlap:
+                speaker, best_overlap = turns[i][2], overlap
+            i += 1
+
+        if speaker is None:
+            # Word in a gap between turns: take the closest turn
+            previous = turns[first - 1] if first > 0 else None
+            following = turns[first]
+            if previous is not None and start - previous[1] < following[0] - end:
+                speaker = previous[2]
+            else:
+                speaker = following[2]
+
+        if segments and segments[-1]["speaker"] == speaker:
+            segments[-1]["end"] = end
+            segments[-1]["transcription"] += word["text"]
+        else:
+            segments.append({"speaker": speaker, "start": start, "end": end, "transcription": word["text"]})
+
+    for segment in segments:
+        segment["transcription"] = segment["transcription"].strip()
+    return segments
     
 # parse_transcript("final_transcription.txt")
 
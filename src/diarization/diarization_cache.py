@@ -0,0 +1,83 @@
+import os, sys
+import hashlib
+import pyannote.audio
+from pyannote.core import Annotation, Segment
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.model_loader import PYANNOTE_MODEL
+from services import logger
+from config import config
+
+CACHE_DIR = os.path.join(config.get("cache_dir", "./cache"), "diarization")
+
+
+def diarization_cache_key(audio):
+    """
+    Computes the cache key of a diarization result.
+
+    Args:
+        audio (numpy.ndarray): Normalised 16kHz mono float32 waveform.
+
+    Returns:
+        str: sha256 of the audio samples and of the pipeline version.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{PYANNOTE_MODEL}:{pyannote.audio.__version__}".encode("utf-8"))
+    digest.update(memoryview(audio).cast("B"))
+    return digest.hexdigest()
+
+
+def load_cached_diarization(key):
+    """
+    Loads a diarization result from the RTTM cache.
+
+    Args:
+        key (str): Cache key returned by diarization_cache_key.
+
+    Returns:
+        Annotation or None: The cached diarization, None on a cache miss.
+    """
+    rttm_path = os.path.join(CACHE_DIR, f"{key}.rttm")
+    if not os.path.exists(rttm_path):
+        return None
+
+    try:
+        annotation = Annotation(uri=key)
+        with open(rttm_path, "r", encoding="utf-8") as f:
+            for track, line in enumerate(f):
+                fields = line.split()
+                if len(fields) < 8 or fields[0] != "SPEAKER":
+                    continue
+                start, duration, speaker = float(fields[3]), float(fields[4]), fields[7]
+                annotation[Segment(start, start + duration), track] = speaker
+
+        logger.info(f"Diarization loaded from cache: {rttm_path}")
+        return annotation
+
+    except Exception as e:
+        logger.error(f"Error reading cached diarization {rttm_path}: {e}", exc_info=True)
+        return None
+
+
+def save_diarization(key, annotation):
+    """
+    Saves a diarization result in the RTTM cache.
+
+    Args:
+        key (str): Cache key returned by diarization_cache_key.
+        annotation (Annotation): The diarization returned by the pyannote pipeline.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        rttm_path = os.path.join(CACHE_DIR, f"{key}.rttm")
+        tmp_path = rttm_path + ".tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for turn, _, speaker in annotation.itertracks(yield_label=True):
+                f.write(f"SPEAKER {key} 1 {turn.start:.3f} {turn.duration:.3f} <NA> <NA> {speaker} <NA> <NA>\n")
+        os.replace(tmp_path, rttm_path)
+
+        logger.info(f"Diarization saved in cache: {rttm_path}")
+
+    except Exception as e:
+        logger.error(f"Error saving diarization in cache: {e}", exc_info=True)
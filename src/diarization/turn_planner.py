@@ -0,0 +1,70 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services import logger
+from config import config
+
+
+def plan_turns(turns, duration, max_window=None, max_gap=None, min_duration=None, short_policy=None):
+    """
+    Plans the speaker turns sent to the ASR model, before any transcription.
+
+    Adjacent turns of the same speaker are merged as long as the gap between them is
+    at most max_gap and the merged turn is at most max_window long. Turns still shorter
+    than min_duration are then padded with the surrounding audio ("pad") or dropped ("drop").
+
+    Args:
+        turns (list): Speaker turns (start, end, speaker) from the diarization.
+        duration (float): Duration of the audio in seconds.
+        max_window (float, optional): Maximum length of a merged turn in seconds (config "turn_max_window").
+        max_gap (float, optional): Maximum gap absorbed between two turns in seconds (config "turn_max_gap").
+        min_duration (float, optional): Minimum length of a turn in seconds (config "turn_min_duration").
+        short_policy (str, optional): "pad" or "drop" for the short turns (config "turn_short_policy").
+
+    Returns:
+        tuple: (list of planned turns {"speaker", "start", "end", "audio_start", "audio_end"},
+                number of ASR calls saved)
+    """
+    max_window = config.get("turn_max_window", 30.0) if max_window is None else max_window
+    max_gap = config.get("turn_max_gap", 1.0) if max_gap is None else max_gap
+    min_duration = config.get("turn_min_duration", 0.5) if min_duration is None else min_duration
+    short_policy = short_policy or config.get("turn_short_policy", "pad")
+
+    planned = []
+    for start, end, speaker in sorted(turns):
+        end = min(end, duration)
+        if start >= end:
+            continue
+
+        previous = planned[-1] if planned else None
+        if (
+            previous is not None
+            and previous["speaker"] == speaker
+            and start - previous["end"] <= max_gap
+            and max(end, previous["end"]) - previous["start"] <= max_window
+        ):
+            previous["end"] = max(end, previous["end"])
+            continue
+
+        planned.append({"speaker": speaker, "start": start, "end": end})
+
+    result = []
+    for turn in planned:
+        audio_start, audio_end = turn["start"], turn["end"]
+        missing = min_duration - (audio_end - audio_start)
+
+        if missing > 0:
+            if short_policy == "drop":
+                logger.debug(f"Turn dropped (too short): {turn}")
+                continue
+            # Pads on both sides, shifted when the turn is at the start/end of the audio
+            audio_start = max(0.0, audio_start - missing / 2)
+            audio_end = min(duration, audio_start + min_duration)
+            audio_start = max(0.0, audio_end - min_duration)
+
+        turn["audio_start"], turn["audio_end"] = audio_start, audio_end
+        result.append(turn)
+
+    saved_calls = len(turns) - len(result)
+    logger.info(f"Turn planning: {len(turns)} turns -> {len(result)} ASR calls ({saved_calls} saved)")
+    return result, saved_calls
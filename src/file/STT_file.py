@@ -6,8 +6,8 @@ from dotenv import load_dotenv
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from config import config
-from core import do_transcription, load_model
-from services import create_output_file, load_audio, start_post_process, logger
+from core import do_transcription, model_registry, use_model, shift_timestamps, transcribe_batch
+from services import create_output_file, is_silent, iter_audio_blocks, speech_regions, split_at_pauses, start_post_process, write_in_output_formated, logger
 
 # # stockage des models dans le ./models/
 # os.environ["HF_HOME"] =  os.getenv("MODEL_DIR")
@@ -22,14 +22,54 @@ file_path = audio_dir + file_name
 start_time = time.time()
 
 
+def transcribe_speech_regions(audio, model, processor, torch_dtype, device, output_file, time_offset=0.0):
+    """
+    Transcribes only the speech regions of an audio block, found by a VAD pre-pass.
+
+    The regions are transcribed in batch and their timestamps are moved back onto the
+    timeline of the original recording before being written in the output file. A block
+    that is not silent but where the VAD finds no region is transcribed whole, rather
+    than dropped.
+
+    Parameters:
+            audio (numpy.ndarray): 16kHz float32 samples of the block.
+            model, processor, torch_dtype, device: The loaded Whisper model and its settings.
+            output_file (str): File to store the transcription.
+            time_offset (float, optional): Position of the block in the recording, in seconds.
+
+    Returns:
+            float: Duration of the speech transcribed, in seconds.
+    """
+    regions = speech_regions(audio)
+    if not regions:
+        if is_silent(audio):
+            return 0.0
+        logger.warning("VAD found no speech in a block that is not silent, transcribing the whole block")
+        regions = [(0, len(audio))]
+
+    results = transcribe_batch(
+        [audio[start:end] for start, end in regions], model, processor, torch_dtype, device,
+        batch_size=config.get("asr_batch_size", 8)
+    )
+    for (start, end), result in zip(regions, results):
+        if result is not None:
+            shift_timestamps(result, time_offset + start / 16000, (end - start) / 16000)
+            write_in_output_formated(result, output_file)
+
+    return sum(end - start for start, end in regions) / 16000
+
+
 def transcribe_file(audio_file_path, write_auto_correction=True):
     """
     Transcribes the given audio file and writes the transcription output to a file.
     This function performs several steps:
         - Loads the necessary Whisper model along with its processor and settings.
-        - Loads the audio file and computes its duration.
         - Creates an output file based on the audio file's name.
-        - Performs transcription using the loaded model and writes the results.
+        - Streams the audio file by fixed-size blocks (bounded memory), moves each block
+          boundary to the nearest pause before it (split_at_pauses) and transcribes each
+          block, writing the results with timestamps on the original timeline.
+        - With config "file_vad", only the speech regions found by a VAD pre-pass are
+          transcribed (in batch), and the fraction of audio skipped is logged.
         - Executes a post-processing step (including optional auto-correction and deepseek enhancements).
 
     Parameters:
@@ -55,23 +95,36 @@ def transcribe_file(audio_file_path, write_auto_correction=True):
 
         start_time = time.time()
 
-        # Loading the Whisper Model
-        model, processor, torch_dtype, device = load_model()
-
-        charging_time = time.time()
-        logger.info(f"Model loaded in {charging_time - start_time:.2f} seconds")
-
-        # Load audio
-        audio, duration = load_audio(audio_file_path)
-        logger.info(f"Audio file {audio_file_path} loaded successfully. Duration: {duration:.2f} seconds")
-
-        # Define output file
-        file_name = audio_file_path.split("/")[-1].split(".")[0]  # Extract file name
-        file_path = create_output_file(file_name, file_name)
-        logger.info(f"Output file created: {file_path}")
-
-        # Perform transcription
-        do_transcription(audio, model, processor, torch_dtype, device, file_path)
+        # Loading the Whisper Model (kept resident while transcribing)
+        with use_model() as (model, processor, torch_dtype, device):
+            charging_time = time.time()
+            logger.info(f"Model loaded in {charging_time - start_time:.2f} seconds")
+            logger.debug(f"Model registry stats: {model_registry.get_stats()}")
+
+            if not os.path.exists(audio_file_path):
+                raise FileNotFoundError(f"File not found: {audio_file_path}")
+
+            # Define output file
+            file_name = audio_file_path.split("/")[-1].split(".")[0]  # Extract file name
+            file_path = create_output_file(file_name, file_name)
+            logger.info(f"Output file created: {file_path}")
+
+            # Stream the audio by blocks, cut at a pause so no word is split, and perform transcription block by block
+            block_seconds = config.get("file_stream_block_s", 300)
+            use_vad = config.get("file_vad", True)
+            duration = 0.0
+            speech_duration = 0.0
+            for start, block in split_at_pauses(iter_audio_blocks(audio_file_path, block_seconds)):
+                offset = start / 16000
+                logger.info(f"Transcribing block starting at {offset:.2f} seconds")
+                if use_vad:
+                    speech_duration += transcribe_speech_regions(block, model, processor, torch_dtype, device, file_path, offset)
+                else:
+                    do_transcription(block, model, processor, torch_dtype, device, file_path, time_offset=offset)
+                duration = offset + len(block) / 16000
+
+            if use_vad and duration:
+                logger.info(f"VAD: {duration - speech_duration:.2f}s of {duration:.2f}s skipped ({1 - speech_duration / duration:.1%} of the audio)")
 
         end_time = time.time()
         elapsed_time = end_time - charging_time
@@ -4,6 +4,7 @@ import queue
 import re
 import subprocess
 import threading
+import time
 import tkinter as tk
 from tkinter import scrolledtext, ttk, filedialog, Toplevel, Text, BOTH, LEFT, RIGHT, Frame
 from tkinterdnd2 import DND_FILES, TkinterDnD
@@ -14,7 +15,7 @@ import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from services import start_post_process, md_2_docx
+from services import start_post_process, md_2_docx, decode_event, encode_command
 from core import translate_text
 from diarization import start_transcription_n_diarization
 from graph import post_process_graph
@@ -44,8 +45,7 @@ class STTInterface:
         language_var: A tkinter StringVar indicating the language selected for audio processing.
         audio_devices: List of available audio input devices as fetched by ffmpeg.
         selected_device: A tkinter StringVar holding the currently selected audio device.
-        ffmpeg_process: Reference to the ffmpeg subprocess handling audio input.
-        stt_process: Reference to the subprocess running the live STT process.
+        stt_process: Reference to the live STT worker, started with the application (it runs ffmpeg itself).
         queue: A thread-safe queue used for inter-thread communication (transcription and translation updates).
         running: A flag indicating if the recording and STT processes are active.
         translation_display: A scrolled text widget used for displaying translated text.
@@ -54,14 +54,26 @@ class STTInterface:
             Initializes the STT interface, configures the main window, widgets, and necessary variables.
         get_audio_devices()
             Retrieves the list of available audio devices by invoking ffmpeg and parsing its output.
+        start_worker()
+            Launches the live STT worker in the background so the model is loaded once for all the recordings.
+        send_command(command, **fields)
+            Sends a JSON-lines command (start, stop, language, shutdown) to the live STT worker.
         start_process()
-            Starts the audio recording process with ffmpeg and launches the STT live script. It also updates the UI to reflect 
+            Asks the live STT worker to start recording the selected device. It also updates the UI to reflect 
             that the recording has begun.
         listen_to_stt()
-            Spawns a thread to continuously listen to the STDOUT of the STT process and enqueue transcribed text and initiate 
-            translation if enabled.
+            Spawns a thread to continuously listen to the JSON-lines events on the STDOUT of the STT process.
+        handle_event(event)
+            Applies a status, segment or metrics event of the STT process to the interface.
+        update_segment(event)
+            Displays a segment, replacing its previous partial text in place, and initiates translation of final
+            segments if enabled.
         stop_process()
-            Terminates both the ffmpeg and STT subprocesses, stops the live transcription process and updates the UI accordingly.
+            Asks the live STT worker to stop recording (the model stays loaded) and updates the UI accordingly.
+        on_language_change(event)
+            Sends the new audio language to the live STT worker.
+        on_close()
+            Shuts the live STT worker down and closes the application.
         zoom_in()
             Increases the font size of the transcription text as well as the highlight for the last transcribed phrase.
         zoom_out()
@@ -157,6 +169,8 @@ class STTInterface:
             "last_phrase",
             font=("Arial", self.text_size + 2, "bold", "underline"),
         )
+        # Live hypotheses that can still be revised
+        self.text_display.tag_config("partial", foreground="grey")
 
         self.start_button = ttkb.Button(
             root, text="Start", command=self.start_process, bootstyle="success"
@@ -193,10 +207,10 @@ class STTInterface:
         self.selected_device = tk.StringVar(value=self.audio_devices[0])
 
         # Process STT
-        self.ffmpeg_process = None
         self.stt_process = None
         self.queue = queue.Queue()
         self.running = False
+        self.live_metrics = {}
 
         self.root.drop_target_register(DND_FILES)
         self.root.dnd_bind('<<Drop>>', self.drop_event)
@@ -211,6 +225,10 @@ class STTInterface:
         if not self.translation_enabled.get():
             self.translation_display.grid_remove()
 
+        # The live worker keeps the model loaded between recordings
+        self.start_worker()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def get_audio_devices(self):
         """get a list of all devices with ffmpeg."""
         try:
@@ -240,61 +258,97 @@ class STTInterface:
         except Exception as e:
             return [f"Erreur: {e}"]
 
+    def start_worker(self):
+        """Launches the live worker in the background, it loads the model once and waits for commands."""
+        self.stt_process = subprocess.Popen(
+            ["python3", "./src/live/live_worker.py"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        self.text_display.insert(
+            tk.END, f"Loading model {os.getenv('AUDIO_MODEL_NAME')} in the background...\n"
+        )
+        self.text_display.yview(tk.END)
+        self.listen_to_stt()
+
+    def send_command(self, command, **fields):
+        """Sends a command to the live worker."""
+        try:
+            self.stt_process.stdin.write(encode_command(command, **fields))
+            self.stt_process.stdin.flush()
+        except (AttributeError, OSError) as e:
+            self.text_display.insert(tk.END, f"Erreur du worker STT : {e}\n")
+            self.text_display.yview(tk.END)
+
     def start_process(self):
-        """Démarre ffmpeg avec le périphérique sélectionné puis lance STT_live.py."""
-        if self.ffmpeg_process is None and self.stt_process is None:
+        """Demande au worker STT de démarrer l'enregistrement du périphérique sélectionné."""
+        if not self.running:
             self.running = True
             self.start_button.config(text="Stop", bootstyle="danger", command=self.stop_process)
             device_index = self.selected_device.get().split(" ")[0]
             language = self.language_var.get()
 
-            self.ffmpeg_process = subprocess.Popen(
-                [
-                    "ffmpeg",
-                    "-f",
-                    "avfoundation",
-                    "-i",
-                    f":{device_index}",
-                    "-ac",
-                    "1",
-                    "-ar",
-                    "16000",
-                    "-f",
-                    "wav",
-                    "-",
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-            )
-            self.stt_process = subprocess.Popen(
-                [
-                    "python3",
-                    "./src/live/STT_live.py",
-                    self.languages[language]
-                ],
-                stdin=self.ffmpeg_process.stdout,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-                text=True,
-            )
+            self.send_command("start", device=device_index, language=self.languages[language])
 
             self.text_display.insert(
                 tk.END,
-                f"Loading model {os.getenv('AUDIO_MODEL_NAME')} with language({language}) using the device : {self.selected_device.get()}...\n",
+                f"Recording with language({language}) using the device : {self.selected_device.get()}...\n",
             )
             self.text_display.yview(tk.END)
 
-            self.listen_to_stt()
-
     def listen_to_stt(self):
-        """Listen to the STT process and display the transcription."""
+        """Listen to the JSON-lines events of the STT process and display them."""
         def listen():
             for line in self.stt_process.stdout:
-                text = line.strip()
-                self.root.after(0, self.display_transcription, text)
+                event = decode_event(line)
+                if event is not None:
+                    self.root.after(0, self.handle_event, event)
         # Starts a new thread for the STT
         threading.Thread(target=listen, daemon=True).start()
 
+    def handle_event(self, event):
+        """Applies an event of the STT process to the interface."""
+        if event["type"] == "segment":
+            self.update_segment(event)
+        elif event["type"] == "metrics":
+            self.live_metrics = event.get("metrics", {})
+        else:
+            self.text_display.insert(tk.END, f"{event.get('text', '')}\n")
+            self.text_display.yview(tk.END)
+
+    def update_segment(self, event):
+        """
+        Displays a segment, replacing in place the previous (partial) text of the same segment.
+
+        Partial segments are shown in grey and are not translated, the final text is
+        translated and the latency (capture to display) is shown in the title.
+        """
+        tag = f"segment_{event['id']}"
+        text = event.get("text", "")
+        final = event.get("final", True)
+        tags = (tag,) if final else (tag, "partial")
+
+        ranges = self.text_display.tag_ranges(tag)
+        if ranges:
+            self.text_display.delete(ranges[0], ranges[1])
+            if text:
+                self.text_display.insert(ranges[0], f"{text}\n", tags)
+        elif text:
+            self.text_display.insert(tk.END, f"{text}\n", tags)
+
+        if final:
+            # A final segment is never revised
+            self.text_display.tag_delete(tag)
+            if text:
+                self.highlight_last_phrase()
+                threading.Thread(target=self.process_translation, args=(text,), daemon=True).start()
+            if event.get("capture_time"):
+                latency = time.time() - event["capture_time"]
+                self.root.title(f"STT Interface - latence {latency:.1f} s")
+        self.text_display.yview(tk.END)
+
     def display_transcription(self, text):
         """Display the transcription in the text display area."""
         self.text_display.insert(tk.END, f"{text}\n")
@@ -335,20 +389,29 @@ class STTInterface:
 
 
     def stop_process(self):
-        """Stop the ffmpeg and STT processes."""
-        if self.ffmpeg_process:
+        """Ask the STT worker to stop recording, the model stays loaded."""
+        if self.running:
             self.running = False
-            self.ffmpeg_process.terminate()
-            self.ffmpeg_process = None
+            self.send_command("stop")
 
-        if self.stt_process:
-            self.stt_process.terminate()
-            self.stt_process = None
-        
         self.start_button.config(text="Start", bootstyle="success", command=self.start_process)
         self.text_display.insert(tk.END, "🛑 Enregistrement arrêté.\n")
         self.text_display.yview(tk.END)
 
+    def on_language_change(self, event):
+        """Sends the new audio language to the STT worker (a running recording is restarted)."""
+        self.send_command("language", language=self.languages[self.language_var.get()])
+
+    def on_close(self):
+        """Shuts the STT worker down and closes the application."""
+        if self.stt_process:
+            self.send_command("shutdown")
+            try:
+                self.stt_process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.stt_process.terminate()
+        self.root.destroy()
+
     def zoom_in(self):
         """Rise the text size."""
         self.text_size += 2
@@ -847,6 +910,7 @@ class STTInterface:
             values=list(self.languages.keys()),
             state="readonly",
         )
+        language_selector.bind("<<ComboboxSelected>>", self.on_language_change)
         language_selector.pack(pady=5)
         
         ttkb.Label(settings_window, text="Traduction en : ", font=("Arial", 12)).pack(pady=5)
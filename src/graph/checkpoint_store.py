@@ -0,0 +1,123 @@
+import os, sys
+import hashlib
+import json
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config import config
+from services import logger
+
+CHECKPOINT_DIR = os.path.join(config.get("cache_dir", "./cache"), "graph_checkpoints")
+
+
+def transcript_key(transcription_text):
+    """Returns the checkpoint key of a transcript (sha256 of its text)."""
+    return hashlib.sha256(transcription_text.encode("utf-8")).hexdigest()
+
+
+class GraphCheckpointStore:
+    """Local store of the outputs of the post-processing graph nodes, per transcript.
+
+    Each transcript has one JSON file (named after its key) mapping every completed node to
+    the state update it returned, with the signature of the node (prompt template and model
+    name). The file is rewritten atomically after each node, so a run interrupted at any point
+    can be resumed from the nodes already completed. Parallel branches save their nodes
+    through the same lock.
+
+    Methods:
+        load(key): Returns the saved node outputs of a transcript.
+        load_node(key, node, signature): Returns the saved output of a node if its signature did not change.
+        save_node(key, node, update, signature): Saves the output of a completed node.
+        invalidate(key, nodes): Removes the outputs of some nodes.
+        clear(key): Removes every output of a transcript.
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable graph checkpoint {key}, starting over: {e}")
+            return {}
+
+    def _write(self, key, outputs):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(outputs, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key))
+
+    def load(self, key):
+        """
+        Returns the saved node outputs of a transcript.
+
+        Args:
+            key (str): Checkpoint key of the transcript.
+
+        Returns:
+            dict: {"signature", "output"} of each completed node ({} when nothing is saved).
+        """
+        with self._lock:
+            return self._read(key)
+
+    def load_node(self, key, node, signature=None):
+        """
+        Returns the saved output of a node, ignored when the node changed since it was saved.
+
+        Args:
+            key (str): Checkpoint key of the transcript.
+            node (str): Name of the node.
+            signature (dict, optional): Current prompt template and model name of the node.
+
+        Returns:
+            dict or None: The saved state update, None when there is none or its signature differs.
+        """
+        saved = self.load(key).get(node)
+        if not isinstance(saved, dict) or "output" not in saved:
+            return None
+        if saved.get("signature") != signature:
+            logger.info(f"Checkpoint of node {node} ignored: its prompt or model changed")
+            return None
+        return saved["output"]
+
+    def save_node(self, key, node, update, signature=None):
+        """Saves the state update returned by a completed node, with its signature (prompt template and model name)."""
+        with self._lock:
+            outputs = self._read(key)
+            outputs[node] = {"signature": signature, "output": update}
+            self._write(key, outputs)
+
+    def invalidate(self, key, nodes):
+        """
+        Removes the outputs of some nodes, they will run again on the next run.
+
+        Args:
+            key (str): Checkpoint key of the transcript.
+            nodes (iterable): Names of the nodes to invalidate.
+
+        Returns:
+            list: Names of the nodes that had a saved output.
+        """
+        with self._lock:
+            outputs = self._read(key)
+            removed = [node for node in nodes if outputs.pop(node, None) is not None]
+            if removed:
+                self._write(key, outputs)
+        return removed
+
+    def clear(self, key):
+        """Removes every saved output of a transcript."""
+        with self._lock:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
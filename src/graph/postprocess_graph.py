@@ -1,14 +1,128 @@
+import operator
 import os
 import sys
 import re
-from typing import Dict
+import time
+from typing import Annotated, Dict, TypedDict
 from dotenv import load_dotenv
 from langchain_ollama import OllamaLLM
 from langgraph.graph import END, START, StateGraph
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from config import config
-from services import load_prompt, remove_think_tags
+from services import cached_invoke, invoke_many, load_prompt, log_llm_cache_stats, logger, remove_think_tags
+from .checkpoint_store import GraphCheckpointStore, transcript_key
+
+# "[12.0s - 15.3s] SPEAKER_00 : text" segments of a diarized transcription
+SEGMENT_PATTERN = r"\[\d+(?:\.\d+)?s\s*-\s*\d+(?:\.\d+)?s\]\s*(SPEAKER_\d+)\s*:\s*(.*?)(?=\[\d+(?:\.\d+)?s\s*-\s*\d+(?:\.\d+)?s\]\s*SPEAKER_\d+\s*:|$)"
+
+
+# Nodes each node waits for. Nodes without dependency start from START, nodes that no other
+# node waits for go to END, so independent nodes run in parallel branches.
+NODE_DEPENDENCIES = {
+    "generate_introduction": [],
+    "identification_speakers": [],
+    "shorter_phrase_step_by_step": [],
+    "format_transcription": ["identification_speakers"],
+    "summarize_transcription": ["shorter_phrase_step_by_step"],
+    "generate_feedback": ["summarize_transcription"],
+    "correct_transcription": ["generate_feedback"],
+}
+
+
+# Prompts of each node (concatenated in this order), saved with its checkpoint
+NODE_PROMPTS = {
+    "generate_introduction": ["introduction_prompt_fr"],
+    "identification_speakers": ["identification_prompt_fr"],
+    "format_transcription": ["diarization_prompt_fr"],
+    "shorter_phrase_step_by_step": ["shorter_phrase"],
+    "summarize_transcription": ["summary_prompt_fr"],
+    "precheck_summary": ["precheck_prompt_fr"],
+    "generate_feedback": ["auto_feedback_prompt_fr", "feedback_verdict_instruction_fr"],
+    "correct_transcription": ["correction_prompt_fr"],
+}
+
+
+# "VERDICT: OK" / "VERDICT: CORRIGER" line asked at the end of the feedback and the pre-check
+VERDICT_PATTERN = re.compile(r"VERDICT\s*:\s*\**\s*(OK|CORRIGER)", re.IGNORECASE)
+SCORE_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)\s*/\s*10")
+
+
+def parse_feedback_verdict(feedback_text, min_score=None):
+    """
+    Turns a feedback (or pre-check) response into a structured verdict.
+
+    The "VERDICT:" line asked by the prompt decides. Without it, the summary needs a
+    correction unless every "X/10" score is at least min_score.
+
+    Args:
+        feedback_text (str): Response of the feedback or pre-check model.
+        min_score (float, optional): Lowest score accepted without correction (config "feedback_min_score", 8).
+
+    Returns:
+        dict: {"needs_correction": bool, "source": "verdict" | "scores" | "default", "scores": [float]}
+    """
+    min_score = config.get("feedback_min_score", 8) if min_score is None else min_score
+    scores = [float(score.replace(",", ".")) for score in SCORE_PATTERN.findall(feedback_text or "")]
+
+    verdicts = VERDICT_PATTERN.findall(feedback_text or "")
+    if verdicts:
+        return {"needs_correction": verdicts[-1].upper() != "OK", "source": "verdict", "scores": scores}
+    if scores:
+        return {"needs_correction": min(scores) < min_score, "source": "scores", "scores": scores}
+    # Nothing to parse: keep the correction
+    return {"needs_correction": True, "source": "default", "scores": scores}
+
+
+class TranscriptionState(TypedDict, total=False):
+    """State of the post-processing graph, each node only returns the keys it writes."""
+    transcription_text: str
+    intro: str
+    speakers: str
+    formatted_text: str
+    summarise_phrases: str
+    summary_text: str
+    feedback_text: str
+    corrected_text: str
+    precheck_verdict: dict
+    feedback_verdict: dict
+    # Key of the checkpoints of the transcript (None when checkpoints are disabled)
+    checkpoint_key: str
+    # (start, end) time.perf_counter() of each node, merged from the parallel branches
+    timings: Annotated[Dict[str, tuple], operator.or_]
+
+
+def critical_path(timings, dependencies=NODE_DEPENDENCIES):
+    """
+    Finds the chain of dependent nodes with the longest total duration.
+
+    Args:
+        timings (dict): (start, end) of each node that ran.
+        dependencies (dict, optional): Nodes each node waits for. Defaults to NODE_DEPENDENCIES.
+
+    Returns:
+        tuple: (list of the nodes of the critical path, its duration in seconds).
+    """
+    finish = {}
+    previous = {}
+
+    def longest(node):
+        if node not in finish:
+            dependencies_ran = [dep for dep in dependencies.get(node, []) if dep in timings]
+            before = max(dependencies_ran, key=longest, default=None)
+            previous[node] = before
+            finish[node] = (longest(before) if before else 0.0) + timings[node][1] - timings[node][0]
+        return finish[node]
+
+    if not timings:
+        return [], 0.0
+    node = max(timings, key=longest)
+    duration = finish[node]
+    path = []
+    while node:
+        path.append(node)
+        node = previous[node]
+    return path[::-1], duration
 
 
 class TranscriptionProcessor:
@@ -16,6 +130,7 @@ class TranscriptionProcessor:
     The pipeline performs a sequence of tasks including generating introductions, identifying speakers, formatting raw transcriptions,
     shortening phrases, summarizing the transcription, generating feedback, and finally correcting the transcription based on feedback.
     Each task is executed via a corresponding language model, with prompts tailored for each step.
+    The responses go through the on-disk LLM cache (services/llm_cache.py), so a re-run does not resend identical prompts.
     Attributes:
         output_dir (str): Directory where the final processed transcription file will be saved.
         llm_intro (OllamaLLM): LLM instance used to generate the introduction.
@@ -36,23 +151,43 @@ class TranscriptionProcessor:
             Identifies speakers in the transcription using a dedicated LLM model and updates the state with the identified speakers.
         format_transcription_step_by_step(self, state: Dict) -> Dict:
             Formats the raw transcription (including speaker diarization) by processing segments with a specific LLM prompt,
-            returning the formatted text and updating the state.
+            returning the formatted text and updating the state. The segments are sent concurrently (invoke_many).
         shorter_phrase_step_by_step(self, state: Dict) -> Dict:
             Processes transcription segments to produce shorter phrases for context preservation using a specified LLM model,
-            updating the state with these summarized phrases.
+            updating the state with these summarized phrases. The segments are sent concurrently (invoke_many).
         summarize_transcription(self, state: Dict) -> Dict:
             Generates a comprehensive summary of the transcription based on the shortened phrases,
             updating the state with the summary text.
+        precheck_summary(self, state: Dict) -> Dict:
+            Asks the optional cheap pre-check model (config "llm_precheck") whether the summary needs a feedback.
         generate_feedback(self, state: Dict) -> Dict:
             Produces feedback for the generated summary by comparing it with the original transcription,
-            updating the state with feedback information.
+            updating the state with feedback information and its parsed verdict.
+        route_after_precheck(self, state: Dict) -> str:
+            Conditional edge: runs the feedback only when the pre-check verdict asks for a correction.
+        route_after_feedback(self, state: Dict) -> str:
+            Conditional edge: runs the correction only when the feedback verdict finds issues.
         correct_transcription(self, state: Dict) -> Dict:
             Corrects the summary transcription by incorporating feedback and regenerating a final version,
             updating the state with the corrected transcription.
+        node_prompt(self, name):
+            Returns the prompt template of a node (NODE_PROMPTS).
+        node_signature(self, name):
+            Returns the prompt template and the model name of a node, saved with its checkpoint.
+        timed_node(self, name, node):
+            Wraps a node so that its start and end times are merged in the "timings" key of the state, its output is
+            checkpointed, and a node already completed for the transcript (with the same prompt and model) is resumed
+            from its checkpoint.
+        descendants(self, node):
+            Returns the node and all the nodes that depend on it.
+        invalidate_node(self, file_path: str, node: str):
+            Removes the checkpoints of a node and its descendants, so only they run again on the next run.
         build_graph(self):
-            Constructs and compiles the directed graph (pipeline) that defines the sequence of processing steps. 
-            Nodes in the graph are connected in the following order: generate introduction, speaker identification, 
-            transcription formatting, phrase shortening, transcription summarization, feedback generation, and transcription correction.
+            Constructs and compiles the DAG (pipeline) of the processing steps from NODE_DEPENDENCIES: introduction,
+            speaker identification and phrase shortening run in parallel branches, formatting follows speaker
+            identification, and summarization, feedback generation and correction follow phrase shortening.
+        report_critical_path(self, timings, wall_clock):
+            Logs the chain of dependent nodes that determined the duration of the run.
         process_transcription(self, file_path: str):
             Reads the raw transcription from the specified file, executes the processing pipeline,
             saves the final processed transcription to an output file, and returns the output file path.
@@ -73,139 +208,281 @@ class TranscriptionProcessor:
         self.llm_summary = OllamaLLM(model="deepseek-r1:14b", num_ctx=self.NUM_CTX)
         self.llm_feedback = OllamaLLM(model="deepseek-r1:14b", num_ctx=self.NUM_CTX)
         self.llm_correction = OllamaLLM(model="deepseek-r1:14b", num_ctx=self.NUM_CTX)
-        self.llm_feedback = OllamaLLM(model="deepseek-r1:14b", num_ctx=self.NUM_CTX)
-        self.llm_correction = OllamaLLM(model="deepseek-r1:14b", num_ctx=self.NUM_CTX)
+
+        # Optional cheap model deciding if the summary needs a feedback at all
+        precheck_model = config.get("llm_precheck", "")
+        self.llm_precheck = OllamaLLM(model=precheck_model, num_ctx=self.NUM_CTX) if precheck_model else None
+
+        # Model of each node, saved with its checkpoint
+        self.node_models = {
+            "generate_introduction": self.llm_intro,
+            "identification_speakers": self.llm_speakers,
+            "format_transcription": self.llm_format,
+            "shorter_phrase_step_by_step": self.llm_shorter_phrase,
+            "summarize_transcription": self.llm_summary,
+            "precheck_summary": self.llm_precheck,
+            "generate_feedback": self.llm_feedback,
+            "correct_transcription": self.llm_correction,
+        }
+
+        # Feedback and correction only run when the previous verdict asks for it
+        self.dependencies = dict(NODE_DEPENDENCIES)
+        self.conditions = {"correct_transcription": self.route_after_feedback}
+        if self.llm_precheck is not None:
+            self.dependencies["precheck_summary"] = ["summarize_transcription"]
+            self.dependencies["generate_feedback"] = ["precheck_summary"]
+            self.conditions["generate_feedback"] = self.route_after_precheck
+
+        # Outputs of the completed nodes, to resume an interrupted run
+        self.checkpoints = GraphCheckpointStore() if config.get("graph_checkpoints", True) else None
 
         # Build the LangGraph
         self.graph = self.build_graph()
 
-    def generate_introduction(self, state: Dict) -> Dict:
+    def generate_introduction(self, state: TranscriptionState) -> Dict:
         """Generates an Introduction for the transcription"""
-        prompt_template = load_prompt("introduction_prompt_fr")
-        intro = self.llm_intro.invoke(
-            input=prompt_template.format(transcription_text=state["transcription_text"]),
-            config={"temperature": 0.2},
+        prompt_template = self.node_prompt("generate_introduction")
+        intro = cached_invoke(
+            self.llm_intro,
+            prompt_template.format(transcription_text=state["transcription_text"]),
+            temperature=0.2,
         )
-        state["intro"] = remove_think_tags(intro)
-        return state
+        return {"intro": remove_think_tags(intro)}
 
-    def speakers_identification(self, state: Dict) -> Dict:
+    def speakers_identification(self, state: TranscriptionState) -> Dict:
         """Identification of each speaker"""
-        prompt_template = load_prompt("identification_prompt_fr")
-        speakers = self.llm_speakers.invoke(
-            input=prompt_template.format(transcription_text=state["transcription_text"]),
-            config={"temperature": 0.2},
+        prompt_template = self.node_prompt("identification_speakers")
+        speakers = cached_invoke(
+            self.llm_speakers,
+            prompt_template.format(transcription_text=state["transcription_text"]),
+            temperature=0.2,
         )
-        state["speakers"] = remove_think_tags(speakers)
-        return state
-
-    def format_transcription_step_by_step(self, state: Dict) -> Dict:
-        """Formatting the raw transcription"""
-        prompt_template = load_prompt("diarization_prompt_fr")
-        pattern = r"\[\d+(?:\.\d+)?s\s*-\s*\d+(?:\.\d+)?s\]\s*(SPEAKER_\d+)\s*:\s*(.*?)(?=\[\d+(?:\.\d+)?s\s*-\s*\d+(?:\.\d+)?s\]\s*SPEAKER_\d+\s*:|$)"
-        matches = re.findall(pattern, state["transcription_text"], re.DOTALL)
-
-        formatted_results = []
-        for speaker, content in matches:
-            content = content.strip()
-            result = self.llm_format.invoke(
-                input=prompt_template.format(speakers=state["speakers"], transcription_text=speaker + content),
-                config={"temperature": 0.0},
-            )
-            formatted_results.append(remove_think_tags(result))
-
-        state["formatted_text"] = "\n" + "\n\n".join(formatted_results)
-        return state
-
-    def shorter_phrase_step_by_step(self, state: Dict) -> Dict:
-        """Shorten the phrases for context preservation"""
-        prompt_template = load_prompt("shorter_phrase")
-        pattern = r"\[\d+(?:\.\d+)?s\s*-\s*\d+(?:\.\d+)?s\]\s*(SPEAKER_\d+)\s*:\s*(.*?)(?=\[\d+(?:\.\d+)?s\s*-\s*\d+(?:\.\d+)?s\]\s*SPEAKER_\d+\s*:|$)"
-        matches = re.findall(pattern, state["transcription_text"], re.DOTALL)
-
-        formatted_results = []
-        for speaker, content in matches:
-            content = content.strip()
-            result = self.llm_shorter_phrase.invoke(
-                input=prompt_template.format(transcription_text=speaker + content),
-                config={"temperature": 0.5},
-            )
-            formatted_results.append(remove_think_tags(result))
+        return {"speakers": remove_think_tags(speakers)}
 
-        state["summarise_phrases"] = "\n" + "\n\n".join(formatted_results)
-        return state
+    def format_transcription_step_by_step(self, state: TranscriptionState) -> Dict:
+        """Formatting the raw transcription (the segments are sent concurrently)"""
+        prompt_template = self.node_prompt("format_transcription")
+        segments = [speaker + content.strip() for speaker, content in re.findall(SEGMENT_PATTERN, state["transcription_text"], re.DOTALL)]
 
-    def summarize_transcription(self, state: Dict) -> Dict:
+        results = invoke_many(
+            self.llm_format,
+            [prompt_template.format(speakers=state["speakers"], transcription_text=segment) for segment in segments],
+            temperature=0.0,
+            fallbacks=segments,  # a segment that keeps failing is kept unformatted
+        )
+        formatted_results = [remove_think_tags(result) for result in results]
+        logger.info(f"Formatted {len(segments)} segments")
+
+        return {"formatted_text": "\n" + "\n\n".join(formatted_results)}
+
+    def shorter_phrase_step_by_step(self, state: TranscriptionState) -> Dict:
+        """Shorten the phrases for context preservation (the segments are sent concurrently)"""
+        prompt_template = self.node_prompt("shorter_phrase_step_by_step")
+        segments = [speaker + content.strip() for speaker, content in re.findall(SEGMENT_PATTERN, state["transcription_text"], re.DOTALL)]
+
+        results = invoke_many(
+            self.llm_shorter_phrase,
+            [prompt_template.format(transcription_text=segment) for segment in segments],
+            temperature=0.5,
+            fallbacks=segments,  # a segment that keeps failing is kept as is
+        )
+        formatted_results = [remove_think_tags(result) for result in results]
+        logger.info(f"Shortened {len(segments)} segments")
+
+        return {"summarise_phrases": "\n" + "\n\n".join(formatted_results)}
+
+    def summarize_transcription(self, state: TranscriptionState) -> Dict:
         """Generates the summary of the transcription"""
-        prompt_template = load_prompt("summary_prompt_fr")
-        summary_text = self.llm_summary.invoke(
-            input=prompt_template.format(transcription_text=state["summarise_phrases"]),
-            config={"temperature": 0.7},
+        prompt_template = self.node_prompt("summarize_transcription")
+        summary_text = cached_invoke(
+            self.llm_summary,
+            prompt_template.format(transcription_text=state["summarise_phrases"]),
+            temperature=0.7,
         )
-        state["summary_text"] = remove_think_tags(summary_text)
-        return state
-
-    def generate_feedback(self, state: Dict) -> Dict:
-        """Generates feedback for the summary based on the original transcription"""
-        prompt_template = load_prompt("auto_feedback_prompt_fr")
-        feedback_text = self.llm_feedback.invoke(
-            input=prompt_template.format(transcription_text=state["transcription_text"], summary_text=state["summary_text"]),
-            config={"temperature": 0.3},
+        return {"summary_text": remove_think_tags(summary_text)}
+
+    def precheck_summary(self, state: TranscriptionState) -> Dict:
+        """Asks the cheap pre-check model whether the summary needs a feedback"""
+        prompt_template = self.node_prompt("precheck_summary")
+        precheck_text = cached_invoke(
+            self.llm_precheck,
+            prompt_template.format(transcription_text=state["transcription_text"], summary_text=state["summary_text"]),
+            temperature=0.0,
         )
-        state["feedback_text"] = remove_think_tags(feedback_text)
-        return state
+        return {"precheck_verdict": parse_feedback_verdict(remove_think_tags(precheck_text))}
+
+    def generate_feedback(self, state: TranscriptionState) -> Dict:
+        """Generates feedback for the summary based on the original transcription, ending with a verdict"""
+        prompt_template = self.node_prompt("generate_feedback")
+        feedback_text = remove_think_tags(cached_invoke(
+            self.llm_feedback,
+            prompt_template.format(transcription_text=state["transcription_text"], summary_text=state["summary_text"]),
+            temperature=0.3,
+        ))
+        return {"feedback_text": feedback_text, "feedback_verdict": parse_feedback_verdict(feedback_text)}
+
+    def route_after_precheck(self, state: TranscriptionState) -> str:
+        """Skips feedback and correction when the pre-check finds nothing to fix"""
+        if state["precheck_verdict"]["needs_correction"]:
+            return "generate_feedback"
+        logger.info("Pre-check found no issue: feedback and correction skipped")
+        return END
 
-    def correct_transcription(self, state: Dict) -> Dict:
+    def route_after_feedback(self, state: TranscriptionState) -> str:
+        """Skips the correction when the feedback verdict finds no issue"""
+        verdict = state["feedback_verdict"]
+        if verdict["needs_correction"]:
+            return "correct_transcription"
+        logger.info(f"Feedback found no issue ({verdict['source']}): correction skipped")
+        return END
+
+    def correct_transcription(self, state: TranscriptionState) -> Dict:
         """Corrects the summary based on the feedback"""
-        prompt_template = load_prompt("correction_prompt_fr")
-        corrected_text = self.llm_correction.invoke(
-            input=prompt_template.format(
+        prompt_template = self.node_prompt("correct_transcription")
+        corrected_text = cached_invoke(
+            self.llm_correction,
+            prompt_template.format(
                 transcription_text=state["summarise_phrases"],
                 feedback_response=state["feedback_text"],
                 summary_text=state["summary_text"],
             ),
-            config={"temperature": 0.7},
+            temperature=0.7,
         )
-        state["corrected_text"] = remove_think_tags(corrected_text)
-        return state
+        return {"corrected_text": remove_think_tags(corrected_text)}
+
+    def node_prompt(self, name):
+        """Returns the prompt template of a node, from its prompts in NODE_PROMPTS."""
+        return "".join(load_prompt(prompt) for prompt in NODE_PROMPTS[name])
+
+    def node_signature(self, name):
+        """Returns the prompt template and the model name of a node, a checkpoint is only resumed if they did not change."""
+        return {"prompt": self.node_prompt(name), "model": getattr(self.node_models.get(name), "model", None)}
+
+    def timed_node(self, name, node):
+        """
+        Wraps a node so that it also returns its (start, end) time in the "timings" key.
+
+        With checkpoints, the output of the node is saved once it completes (with its prompt
+        template and model name), and a node already completed for the transcript returns its
+        saved output instead of running, unless its prompt or model changed since. A node that
+        runs again invalidates the saved outputs of the nodes after it.
+        """
+        def run(state: TranscriptionState) -> Dict:
+            key = state.get("checkpoint_key")
+            start = time.perf_counter()
+            signature = None
+            if key and self.checkpoints is not None:
+                signature = self.node_signature(name)
+                saved = self.checkpoints.load_node(key, name, signature)
+                if saved is not None:
+                    logger.info(f"Node {name} resumed from checkpoint")
+                    return {**saved, "timings": {name: (start, start)}}
+                # The node runs again: the saved outputs of the nodes after it are stale
+                self.checkpoints.invalidate(key, self.descendants(name)[1:])
+
+            update = node(state)
+            end = time.perf_counter()
+            logger.info(f"Node {name} done in {end - start:.1f}s")
+            if key and self.checkpoints is not None:
+                self.checkpoints.save_node(key, name, update, signature)
+            return {**update, "timings": {name: (start, end)}}
+        return run
+
+    def descendants(self, node):
+        """Returns the node and every node that depends on it, directly or not."""
+        found = [node]
+        for current in found:
+            found.extend(
+                name for name, deps in self.dependencies.items() if current in deps and name not in found
+            )
+        return found
+
+    def invalidate_node(self, file_path: str, node: str):
+        """
+        Invalidates the checkpoint of a node and of the nodes after it, so that resuming the
+        interrupted process_transcription of the file re-runs them.
+
+        Args:
+            file_path (str): The path to the file containing the transcription text.
+            node (str): Name of the node to re-run (e.g. "summarize_transcription").
+
+        Returns:
+            list: Names of the nodes whose saved output was removed.
+        """
+        if node not in self.dependencies:
+            raise ValueError(f"Unknown node '{node}', expected one of {list(self.dependencies)}")
+        if self.checkpoints is None:
+            return []
+        with open(file_path, "r", encoding="utf-8") as f:
+            key = transcript_key(f.read())
+        removed = self.checkpoints.invalidate(key, self.descendants(node))
+        logger.info(f"Checkpoints invalidated for {file_path}: {', '.join(removed) or 'none'}")
+        return removed
 
     def build_graph(self):
         """
         
         Constructs and compiles the pipeline graph for transcription post-processing.
 
-        This method creates a state graph representing a sequence of post-processing steps,
-        including introduction generation, speaker identification, transcription formatting,
-        phrase shortening, summarization, feedback generation, and transcription correction.
-        The graph is built by adding individual processing nodes and linking them with directed edges
-        that define the execution order, starting from a designated START node and ending at an END node.
+        The graph is a DAG built from the node dependencies: introduction generation, speaker
+        identification and phrase shortening only read the transcription, so they start
+        together from START in parallel branches. Formatting waits for the speakers,
+        summarization for the shortened phrases, then feedback generation and correction
+        follow the summary. The branches join at END.
+
+        The correction is a conditional edge: it only runs when the feedback verdict asks
+        for it. With config "llm_precheck", a cheap model first decides if the feedback is
+        needed at all.
 
         Returns:
             A compiled state graph that encapsulates the defined transcription post-processing pipeline.
         """
-        graph = StateGraph(dict)
+        graph = StateGraph(TranscriptionState)
 
         # Adding nodes to the graph
-        graph.add_node("generate_introduction", self.generate_introduction)
-        graph.add_node("shorter_phrase_step_by_step", self.shorter_phrase_step_by_step)
-        graph.add_node("identification_speakers", self.speakers_identification)
-        graph.add_node("format_transcription", self.format_transcription_step_by_step)
-        graph.add_node("summarize_transcription", self.summarize_transcription)
-        graph.add_node("generate_feedback", self.generate_feedback)
-        graph.add_node("correct_transcription", self.correct_transcription)
+        nodes = {
+            "generate_introduction": self.generate_introduction,
+            "shorter_phrase_step_by_step": self.shorter_phrase_step_by_step,
+            "identification_speakers": self.speakers_identification,
+            "format_transcription": self.format_transcription_step_by_step,
+            "summarize_transcription": self.summarize_transcription,
+            "generate_feedback": self.generate_feedback,
+            "correct_transcription": self.correct_transcription,
+        }
+        if self.llm_precheck is not None:
+            nodes["precheck_summary"] = self.precheck_summary
+        for name, node in nodes.items():
+            graph.add_node(name, self.timed_node(name, node))
 
         # Graph links
-        graph.add_edge(START, "generate_introduction")        
-        graph.add_edge("generate_introduction", "identification_speakers")
-        graph.add_edge("identification_speakers", "format_transcription")
-        graph.add_edge("format_transcription", "shorter_phrase_step_by_step")
-        graph.add_edge("shorter_phrase_step_by_step", "summarize_transcription")
-        graph.add_edge("summarize_transcription", "generate_feedback")
-        graph.add_edge("generate_feedback", "correct_transcription")
-        graph.add_edge("correct_transcription", END)
+        waited_for = {dep for deps in self.dependencies.values() for dep in deps}
+        for name, deps in self.dependencies.items():
+            if not deps:
+                graph.add_edge(START, name)
+            elif name in self.conditions:
+                # Runs the node or ends the branch, according to the router
+                graph.add_conditional_edges(deps[0], self.conditions[name], [name, END])
+            elif len(deps) == 1:
+                graph.add_edge(deps[0], name)
+            else:
+                graph.add_edge(deps, name)  # join: waits for all the dependencies
+            if name not in waited_for:
+                graph.add_edge(name, END)
 
         return graph.compile()
 
+    def report_critical_path(self, timings, wall_clock):
+        """Logs the critical path of a run against its wall-clock time and the sum of the node durations."""
+        path, duration = critical_path(timings, self.dependencies)
+        total = sum(end - start for start, end in timings.values())
+        logger.info(
+            f"Post-process done in {wall_clock:.1f}s (nodes total {total:.1f}s). "
+            f"Critical path {duration:.1f}s: " + " -> ".join(
+                f"{node} ({timings[node][1] - timings[node][0]:.1f}s)" for node in path
+            )
+        )
+        return path, duration
+
 
     def process_transcription(self, file_path: str):
         """
@@ -213,9 +490,11 @@ class TranscriptionProcessor:
         and saving the resulting formatted transcription to a new Markdown file.
         This function:
             - Reads the transcription from the given file.
-            - Invokes a processing pipeline with the transcription text as input.
+            - Invokes a processing pipeline with the transcription text as input, resuming from the
+              checkpoints of the nodes already completed for this transcript (config "graph_checkpoints").
             - Formats the output from the pipeline into a Markdown file.
-            - Saves the Markdown file in the designated output directory.
+            - Saves the Markdown file in the designated output directory, then removes the checkpoints
+              of the transcript (they only serve to resume an interrupted run).
         Args:
             file_path (str): The path to the file containing the transcription text.
         Returns:
@@ -228,7 +507,19 @@ class TranscriptionProcessor:
 
         # Calling the pipeline of langgraph
         initial_state = {"transcription_text": transcription_text}
+        if self.checkpoints is not None:
+            initial_state["checkpoint_key"] = transcript_key(transcription_text)
+            completed = self.checkpoints.load(initial_state["checkpoint_key"])
+            if completed:
+                logger.info(f"Resuming post-process, {len(completed)} node(s) already completed: {', '.join(completed)}")
+        start = time.perf_counter()
         result = self.graph.invoke(initial_state)
+        timings = result.get("timings", {})
+        self.report_critical_path(timings, time.perf_counter() - start)
+        skipped = [node for node in self.dependencies if node not in timings]
+        if skipped:
+            logger.info(f"Skipped {len(skipped)} LLM call(s): {', '.join(skipped)}")
+        log_llm_cache_stats()
 
         # Saving the output file
         file_name = os.path.basename(file_path).split(".")[0]
@@ -243,10 +534,14 @@ class TranscriptionProcessor:
             f.write(result["formatted_text"])
             f.write("\n")
             f.write(result["summary_text"])
+            # Feedback and correction are missing when they were skipped
             f.write("\n")
-            f.write(result["feedback_text"])
+            f.write(result.get("feedback_text", ""))
             f.write("\n")
-            f.write(result["corrected_text"])
+            f.write(result.get("corrected_text", ""))
+
+        if self.checkpoints is not None:
+            self.checkpoints.clear(initial_state["checkpoint_key"])
 
         print(f"\n Transcription saved here : {output_path}")
         return str(output_path)
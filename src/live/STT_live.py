@@ -1,18 +1,23 @@
 ### --- This file is the entry point of the live Speech to Text application--- ###
 
 import os
-import re
 import sys
+import threading
+import time
 from datetime import datetime
-from io import BytesIO
 
-import numpy as np
 from dotenv import load_dotenv
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from config import config
-from core import do_transcription, load_model
-from services import create_output_file, start_post_process,logger
+from core import do_transcription, transcribe_words, use_model
+from services import create_output_file, start_post_process, write_in_output_formated, logger, EventWriter
+from live.local_agreement import LocalAgreementStreamer
+from live.ring_buffer import AudioRingBuffer
+from live.text_cleanup import TextCleaner
+from live.vad_segmenter import VadSegmenter
+from live.window_sizer import AdaptiveWindowSizer
+from live.window_queue import WindowQueue
 
 # Loads .env
 load_dotenv()
@@ -23,143 +28,250 @@ reunion_name = config.get("REUNION_NAME")
 date = datetime.today().strftime("_%Y-%m-%d_%H:%M:%S")
 file_name = reunion_name + date
 
+# Events sent to the interface, one JSON line each (see services/live_protocol.py)
+events = EventWriter(sys.stdout)
+
 def send_text(text):
-    """Function to send text to the interface"""
-    print(text)
-    sys.stdout.flush()
+    """Function to send a status message to the interface"""
+    events.status(text)
 
 
-def cleanup_text(previous_text, new_text):
-    """
-    Cleans up transcribed text by removing repetitions between consecutive transcriptions and within the same text.
-
-    This function performs the following cleanup operations:
-    1. Removes overlapping text between consecutive transcriptions
-    2. Removes repeated single words
-    3. Removes repeated word pairs
-    4. Normalizes spacing
-
-    Parameters
-    ----------
-    previous_text : str
-        The previously transcribed text segment
-    new_text : str
-        The newly transcribed text segment
-
-    Returns
-    -------
-    str : The cleaned text with repetitions removed and proper spacing
+def emit_words(words, output_file, segment_id, capture_time, final=True):
     """
-    if not previous_text:
-        return new_text  # First pass, nothing to clean.
-
-    # Temporarily removes punctuation to compare repetitions
-    prev_clean = re.sub(r"[^\w\s]", "", previous_text).lower().split()
-    new_clean = re.sub(r"[^\w\s]", "", new_text).lower().split()
+    Sends words (start, end, text) to the interface as one segment.
 
-    # Searches for the longest repeated sequence
-    overlap = 0
-    max_overlap = min(len(prev_clean), len(new_clean))
+    Final words are also appended to the output file, partial ones are replaced by the
+    next event with the same segment id.
 
-    for i in range(1, max_overlap + 1):
-        if (
-            prev_clean[-i:] == new_clean[:i]
-        ):  # Checks if the end of previous_text == start of new_text
-            overlap = i
-
-    # Keeps the original form of new_text but removes the repetition
-    words_new = new_text.split()
-    cleaned_text = " ".join(
-        words_new[overlap:]
-    )  # Preserves the original punctuation of new_text
-
-    # Removes internal repetitions ("I call I call" → "I call")
-    cleaned_text = re.sub(r"\b(\w+)\s+\1\b", r"\1", cleaned_text, flags=re.IGNORECASE)
+    Returns:
+        bool: True when a segment was sent.
+    """
+    if not words:
+        return False
+    text = "".join(word[2] for word in words).strip()
+    events.segment(segment_id, text, words[0][0], words[-1][1], capture_time, final=final)
+    if final:
+        write_in_output_formated({"chunks": [{"timestamp": (words[0][0], words[-1][1]), "text": text}]}, output_file)
+    return True
 
-    # Removes repetitions of word groups ("success story success story" → "success story")
-    cleaned_text = re.sub(
-        r"(\b\w+\s+\w+\b)\s+\1", r"\1", cleaned_text, flags=re.IGNORECASE
-    )
+def capture_audio(stream, window_queue, window_samples, overlap_samples, read_size=4096, segmenter=None, sizer=None):
+    """
+    Capture thread: reads the audio stream into a ring buffer and queues a window
+    (with the overlap of the previous one) each time enough new audio is buffered.
+    With a VAD segmenter, the windows are cut at the pauses instead and the silent
+    ones are skipped; the window in progress is queued at the end of the stream.
 
-    # Removes unnecessary spaces
-    cleaned_text = re.sub(r"\s+", " ", cleaned_text).strip()
+    Args:
+        stream: Binary stream of 16-bit PCM at 16kHz (e.g. sys.stdin.buffer)
+        window_queue (WindowQueue): Queue consumed by the inference worker
+        window_samples (int): Number of new samples that triggers a window
+        overlap_samples (int): Number of samples of the previous window kept at the start
+        read_size (int, optional): Size of the blocks read from the stream. Defaults to 4096.
+        segmenter (VadSegmenter, optional): Cuts the windows at the pauses when given.
+        sizer (AdaptiveWindowSizer, optional): Gives the current window length when given,
+            window_samples is then the longest window.
+    """
+    # Room for the overlap, one window and a block read after the threshold
+    longest_window = max(window_samples, segmenter.max_window if segmenter else 0)
+    ring = AudioRingBuffer(2 * (overlap_samples + longest_window) + read_size, read_size)
+    window_start = 0  # Absolute position of the audio not queued yet
+    try:
+        while ring.fill(stream):
+            if segmenter is not None:
+                for start, end in segmenter.update(ring):
+                    window_queue.put(ring.window(start, end), start, end)
 
-    return cleaned_text
+            elif ring.written - window_start >= (sizer.window_samples if sizer else window_samples):
+                # Ajouter l'overlap du segment précédent au début du nouveau segment
+                start = max(window_start - overlap_samples, ring.oldest())
+                window_queue.put(ring.window(start, ring.written), start, ring.written)
+                window_start = ring.written
 
-file_path = create_output_file(file_name, reunion_name, date)
+        # End of the stream: the utterance in progress is still transcribed
+        if segmenter is not None:
+            window = segmenter.flush(ring)
+            if window is not None:
+                window_queue.put(ring.window(*window), *window)
+    except Exception as e:
+        logger.error(f"Error while capturing audio: {e}", exc_info=True)
+    finally:
+        window_queue.close()
 
-def transcribe_stream( language,write_auto_correction=True):
+def transcribe_stream( language,write_auto_correction=True, output_file=None, stream=None):
     """
     Process a continuous audio stream and perform real-time speech-to-text transcription.
-    This function reads audio data from standard input in chunks, processes it using a pre-loaded
-    speech recognition model, and performs transcription with overlap handling to ensure smooth
-    continuous transcription across audio segments.
+    A capture thread reads audio data from standard input in chunks and queues windows in a
+    bounded queue, while this function consumes them with a pre-loaded speech recognition model,
+    so the ffmpeg pipe is always drained even when inference is slower than real time.
     Args:
         language (str): The language code for transcription (e.g., 'en' for English, 'fr' for French)
         write_auto_correction (bool, optional): Flag to enable auto-correction in post-processing. 
             Defaults to True.
+        output_file (str, optional): Transcription file, created from the meeting name if not given.
+        stream (optional): Binary stream of 16-bit PCM at 16kHz. Defaults to sys.stdin.buffer.
     Returns:
         None
     Raises:
         Exception: Any exception that occurs during the transcription process is caught and logged.
     Notes:
         - The function expects 16-bit PCM audio input at 16kHz sampling rate
-        - Uses a 0.5 second overlap between segments to maintain continuity
-        - Processes audio in chunks when buffer reaches 3 seconds of data
-        - Previous text segments are used for context and cleanup
+        - stdin is read with readinto straight into a preallocated float32 ring buffer
+        - When the queue is full, the overload policy (config "live_overload_policy") drops
+          the oldest window, merges windows or skips silent ones
+        - Queue depth, lag and overload counters are logged every "live_metrics_interval_s"
+        - The results are sent on stdout as JSON-lines events (services/live_protocol.py):
+          each segment has an id, its audio start/end, capture and emit times and a
+          partial/final flag; the tentative words of local agreement are partial segments
+        - Uses an overlap between segments (config "live_overlap_s", 0.5 s) to maintain
+          continuity, kept by index arithmetic on the ring buffer (no copy)
+        - Processes audio in chunks when "live_window_s" seconds of new audio are buffered
+        - With config "live_adaptive_window", the duration of each inference call is measured
+          and the window is shortened from live_window_s down to live_window_min_s as long as
+          inference keeps up (live_max_rtf), under the live_target_latency_s ceiling (see
+          AdaptiveWindowSizer); in VAD mode it tunes the longest window instead
+        - The overlap with the previous segment is removed by a TextCleaner (linear-time
+          suffix/prefix matching on the cached tokens of the previous segment)
+        - With config "live_mode" set to "local_agreement", the windows feed a growing buffer
+          re-decoded with word timestamps, and only the words agreed by two consecutive
+          hypotheses are sent (see LocalAgreementStreamer)
+        - With config "live_segmentation" set to "vad", the windows are cut at the pauses
+          (between vad_min_window_s and vad_max_window_s) and pure-silence windows are never
+          transcribed; the skipped windows are reported in the live metrics
     """
-    buffer = BytesIO()
-    model, processor, torch_dtype, device = load_model()
-
-    overlap_duration = 0.5  # 0.30 seconde d'overlapping
-    sample_rate = 16000  # Whisper travaille à 16kHz
-    overlap_samples = int(
-        overlap_duration * sample_rate * 2
-    )  # Nombre d'échantillons à conserver pour l'overlap
-    previous_audio = b""  # Stocke les données de l'overlap
-    previous_text = ""
-    send_text("Ready to transcribe...")
-    send_text("\n")
-    try:
-        while True:
-            data = sys.stdin.buffer.read(4096)  # Lire des blocs de 4096 octets
-            if not data:
-                break
-
-            buffer.write(data)
-            buffer_size = buffer.tell()
-            
-            # calcul du temps : taille du buffer / (echantillonnage * nombre de channels * taille d'un échantillon)
-            # elapsed_time = buffer_size / (16000 * 1 * 2)
-            # print("Buffer size:", buffer_size)
-
-            if (buffer.tell() >= sample_rate * 3):  # Vérifier si on a 1,30 secondes d'audio
-                buffer.seek(0)
-                audio_data = buffer.read()
-                buffer = BytesIO()
+    file_path = output_file or create_output_file(file_name, reunion_name, date)
+    # Already resident when called from the live worker, and kept resident for the
+    # whole session (not evicted by the model registry budget)
+    with use_model() as (model, processor, torch_dtype, device):
+        sample_rate = 16000  # Whisper travaille à 16kHz
+        # A window is transcribed when live_window_s seconds of new audio are buffered
+        window_samples = int(config.get("live_window_s", 1.5) * sample_rate)
+        overlap_samples = int(config.get("live_overlap_s", 0.5) * sample_rate)  # 0.5 seconde d'overlapping
+        read_size = 4096  # Lire des blocs de 4096 octets
 
-                # Ajouter l'overlap du segment précédent au début du nouveau segment
-                audio_data = previous_audio + audio_data
-                previous_audio = audio_data[-overlap_samples:]  # Stocker l'overlap pour le prochain segment
+        # Window length tuned from the measured inference time, never longer than the configured
+        # window (the longest VAD window in VAD mode) so the latency never gets worse
+        sizer = None
+        if config.get("live_adaptive_window", True):
+            if config.get("live_segmentation", "fixed") == "vad":
+                configured_window_s = config.get("vad_max_window_s", 6.0)
+            else:
+                configured_window_s = window_samples / sample_rate
+            sizer = AdaptiveWindowSizer(
+                sample_rate,
+                window_s=configured_window_s,
+                min_window_s=config.get("live_window_min_s", 1.0),
+                max_window_s=configured_window_s,
+                target_latency_s=config.get("live_target_latency_s", 3.0),
+                max_rtf=config.get("live_max_rtf", 0.8),
+            )
+            window_samples = int(sizer.max_window_s * sample_rate)
+
+        # "local_agreement" re-decodes a growing buffer and commits the stable words only
+        streamer = None
+        if config.get("live_mode", "windows") == "local_agreement":
+            overlap_samples = 0  # the streamer keeps the uncommitted audio itself
+            streamer = LocalAgreementStreamer(
+                lambda audio: transcribe_words(audio, model, processor, torch_dtype, device, lang_code=language),
+                sample_rate,
+                config.get("live_agreement_buffer_s", 20.0),
+            )
+
+        # "vad" cuts the windows at the pauses and skips the silent ones
+        segmenter = None
+        if config.get("live_segmentation", "fixed") == "vad":
+            overlap_samples = 0  # windows end on a pause, no word is split
+            segmenter = VadSegmenter(
+                sample_rate,
+                min_window_s=config.get("vad_min_window_s", 1.0),
+                max_window_s=config.get("vad_max_window_s", 6.0),
+                pause_s=config.get("vad_pause_s", 0.3),
+                fixed_window_s=config.get("live_window_s", 1.5),
+            )
+            vad_max_window = segmenter.max_window
+
+        # Windows waiting for inference, merged windows can grow up to live_merge_max_s.
+        # A window is cut after a whole read, so it can be up to read_size // 2 samples longer
+        window_queue = WindowQueue(
+            maxsize=config.get("live_queue_size", 4),
+            window_capacity=max(
+                int(max(config.get("live_merge_max_s", 6.0), config.get("vad_max_window_s", 6.0)) * sample_rate),
+                window_samples + overlap_samples + read_size // 2,
+            ),
+            policy=config.get("live_overload_policy", "drop_oldest"),
+            silence_rms=config.get("live_silence_rms", 0.01),
+        )
+        capture_thread = threading.Thread(
+            target=capture_audio,
+            args=(stream or sys.stdin.buffer, window_queue, window_samples, overlap_samples, read_size, segmenter, sizer),
+            daemon=True,
+        )
+
+        cleaner = TextCleaner()
+        segment_id = 0
+        partial_shown = False  # a partial segment is displayed for segment_id
+        metrics_interval = config.get("live_metrics_interval_s", 10)
+        last_metrics = time.time()
+        send_text("Ready to transcribe...")
+        try:
+            capture_thread.start()
+            while True:
+                window = window_queue.get()
+                if window is None:
+                    break
+                # The window is reused by the capture thread once released
+                audio_start, audio_end = window.start / sample_rate, window.end / sample_rate
+                capture_time = window.capture_time
+
+                results = None
+                started = time.perf_counter()
+                try:
+                    if streamer is not None:
+                        forced = streamer.insert(window.samples)
+                        committed, tentative = streamer.process()
+                        # The final text replaces the partial one of the same segment
+                        if emit_words(forced + committed, file_path, segment_id, capture_time):
+                            segment_id += 1
+                        if not emit_words(tentative, file_path, segment_id, capture_time, final=False) and partial_shown:
+                            events.segment(segment_id, "", audio_end, audio_end, capture_time, final=False)
+                        partial_shown = bool(tentative)
+                    else:
+                        results = do_transcription(window.samples, model, processor, torch_dtype, device, file_path,lang_code=language)
+                finally:
+                    window_queue.release(window)
+
+                if sizer is not None:
+                    sizer.update(time.perf_counter() - started, audio_end - audio_start)
+                    if segmenter is not None:
+                        segmenter.max_window = min(max(segmenter.min_window, sizer.window_samples), vad_max_window)
 
-                # Convertir l'audio
-                audio = (np.frombuffer(audio_data, dtype=np.int16).astype(np.float32)/ 32768.0)
-                results = do_transcription(audio, model, processor, torch_dtype, device, file_path,lang_code=language)
-                
                 if results:
-                    new_text = results["text"]
-                    cleaned_text = cleanup_text(previous_text, new_text)
-                    send_text(cleaned_text)
-                    previous_text = new_text
-        # logger.info("Starting post process")
-        # start_post_process(write_auto_correction, file_path, file_name)
+                    events.segment(
+                        segment_id, cleaner.clean(results["text"]), audio_start, audio_end, capture_time
+                    )
+                    segment_id += 1
 
-    except Exception as e:
-        logger.info(f"erreur : {e}")
-    #     logger.info("Starting post process")
-    #     start_post_process(write_auto_correction, file_path, file_name)
+                if time.time() - last_metrics >= metrics_interval:
+                    last_metrics = time.time()
+                    metrics = window_queue.metrics()
+                    if segmenter is not None:
+                        metrics.update(segmenter.metrics())
+                    if sizer is not None:
+                        metrics["window_s"] = sizer.window_s
+                    logger.info(f"Live metrics: {metrics}")
+                    events.metrics(metrics)
+
+            if streamer is not None:
+                emit_words(streamer.finish(), file_path, segment_id, time.time())
+            # logger.info("Starting post process")
+            # start_post_process(write_auto_correction, file_path, file_name)
+
+        except Exception as e:
+            logger.info(f"erreur : {e}")
+        #     logger.info("Starting post process")
+        #     start_post_process(write_auto_correction, file_path, file_name)
 
 if __name__ == "__main__":
     language = sys.argv[1] if len(sys.argv) > 1 else "transcribe"
-    transcribe_stream(language)
+    file_path = create_output_file(file_name, reunion_name, date)
+    transcribe_stream(language, output_file=file_path)
     start_post_process(True, file_path, file_name)
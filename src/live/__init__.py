@@ -1,3 +1,4 @@
 from .STT_live import transcribe_stream
+from .live_worker import LiveWorker
 
-__all__ = ["transcribe_stream"]
+__all__ = ["transcribe_stream", "LiveWorker"]
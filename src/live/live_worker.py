@@ -0,0 +1,136 @@
+### --- Long-lived live transcription worker, controlled by the interface --- ###
+# Usage : python3 ./src/live/live_worker.py
+# Commands are read as JSON lines on stdin (see services/live_protocol.py):
+#   {"cmd": "start", "device": "0", "language": "fr"}  starts recording and transcribing
+#   {"cmd": "stop"}                                     stops the current session
+#   {"cmd": "language", "language": "en"}               changes the language (restarts a running session)
+#   {"cmd": "shutdown"}                                 stops and exits (also on end of stdin)
+# Events are written as JSON lines on stdout, like STT_live.py.
+
+import os
+import subprocess
+import sys
+import threading
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core import transcribe_words, use_model
+from services import create_output_file, decode_command, logger
+from live.STT_live import reunion_name, send_text, transcribe_stream
+
+
+def ffmpeg_command(device):
+    """ffmpeg command recording an avfoundation audio device as 16kHz mono 16-bit PCM on stdout."""
+    return [
+        "ffmpeg",
+        "-f",
+        "avfoundation",
+        "-i",
+        f":{device}",
+        "-ac",
+        "1",
+        "-ar",
+        "16000",
+        "-f",
+        "s16le",
+        "-",
+    ]
+
+
+class LiveWorker:
+    """Keeps the ASR model resident and runs live transcription sessions on demand.
+
+    The model is loaded (and warmed up with one inference) when the worker starts, so a
+    session only has to spawn ffmpeg: the model registry returns the resident model to
+    transcribe_stream. Each session records in its own output file.
+
+    Methods:
+        warm_up(): Loads the model and runs a first inference.
+        start(device, language): Starts a session (stops the running one first).
+        stop(): Stops the running session and waits for its last windows.
+        set_language(language): Changes the language, restarting a running session.
+        run(commands): Executes the commands read from a text stream until shutdown.
+    """
+
+    def __init__(self):
+        self.device = "0"
+        self.language = ""
+        self._ffmpeg = None
+        self._session = None
+
+    def warm_up(self):
+        """Loads the model and runs one inference so the first session starts immediately."""
+        with use_model() as (model, processor, torch_dtype, device):
+            transcribe_words(np.zeros(16000, dtype=np.float32), model, processor, torch_dtype, device)
+        send_text("Model loaded")
+
+    def start(self, device=None, language=None):
+        """Starts recording the device and transcribing it in the given language."""
+        self.stop()
+        self.device = self.device if device is None else device
+        self.language = self.language if language is None else language
+
+        date = datetime.today().strftime("_%Y-%m-%d_%H:%M:%S")
+        output_file = create_output_file(reunion_name + date, reunion_name, date)
+        self._ffmpeg = subprocess.Popen(ffmpeg_command(self.device), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self._session = threading.Thread(
+            target=transcribe_stream,
+            args=(self.language,),
+            kwargs={"output_file": output_file, "stream": self._ffmpeg.stdout},
+            daemon=True,
+        )
+        self._session.start()
+        logger.info(f"Live session started on device {self.device} (language '{self.language}'): {output_file}")
+
+    def stop(self):
+        """Stops the running session, the windows already captured are still transcribed."""
+        if self._ffmpeg is None:
+            return
+        # End of the ffmpeg stream: the capture thread closes the queue and the session ends
+        self._ffmpeg.terminate()
+        self._ffmpeg.wait()
+        self._session.join()
+        self._ffmpeg = None
+        self._session = None
+        send_text("Recording stopped")
+
+    def set_language(self, language):
+        """Changes the transcription language, restarting the running session if any."""
+        if self._ffmpeg is not None:
+            self.start(language=language)
+        else:
+            self.language = language
+
+    def run(self, commands):
+        """
+        Executes the commands read from a text stream until "shutdown" or its end.
+
+        Args:
+            commands: Text stream of JSON-lines commands (e.g. sys.stdin).
+        """
+        for line in commands:
+            command = decode_command(line)
+            if command is None:
+                logger.warning(f"Ignoring invalid live command: {line.strip()}")
+                continue
+            try:
+                if command["cmd"] == "start":
+                    self.start(command.get("device"), command.get("language"))
+                elif command["cmd"] == "stop":
+                    self.stop()
+                elif command["cmd"] == "language":
+                    self.set_language(command.get("language", ""))
+                else:
+                    break
+            except Exception as e:
+                logger.error(f"Live command {command} failed: {e}", exc_info=True)
+                send_text(f"Erreur : {e}")
+        self.stop()
+
+
+if __name__ == "__main__":
+    worker = LiveWorker()
+    worker.warm_up()
+    worker.run(sys.stdin)
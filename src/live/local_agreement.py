@@ -0,0 +1,130 @@
+import re
+
+import numpy as np
+
+
+def normalize_word(text):
+    """Lowercase word without punctuation, used to compare two hypotheses."""
+    return re.sub(r"[^\w]", "", text).lower()
+
+
+class LocalAgreementStreamer:
+    """Streaming commit policy (local agreement) for live transcription.
+
+    The audio not committed yet is kept in a growing buffer which is re-decoded, with word
+    timestamps, each time new audio arrives. A prefix of words is committed only once two
+    consecutive hypotheses agree on it, then the buffer is trimmed at the end timestamp of the
+    last committed word so that it is never decoded again.
+
+    Attributes:
+        offset (float): Absolute time (seconds) of the first sample of the buffer.
+        committed_end (float): Absolute end time of the last committed word.
+
+    Methods:
+        insert(samples): Appends new audio to the buffer (returns the words force-committed when full).
+        process(): Re-decodes the buffer and returns (committed words, tentative words).
+        finish(): Commits the remaining tentative words at the end of the stream.
+    """
+
+    def __init__(self, transcribe_words, sample_rate=16000, max_buffer_s=20.0):
+        """
+        Args:
+            transcribe_words (callable): Function taking float32 16kHz audio and returning the
+                pipeline result with word chunks ({"text", "timestamp": (start, end)}), or None.
+            sample_rate (int, optional): Sample rate of the audio. Defaults to 16000.
+            max_buffer_s (float, optional): Size of the buffer, the hypothesis is committed
+                when it is full. Defaults to 20.
+        """
+        self.transcribe_words = transcribe_words
+        self.sample_rate = sample_rate
+        self._buffer = np.empty(int(max_buffer_s * sample_rate), dtype=np.float32)
+        self._length = 0
+        self.offset = 0.0
+        self.committed_end = 0.0
+        self._committed_tail = []
+        self._hypothesis = []
+
+    def insert(self, samples):
+        """
+        Appends new audio to the buffer.
+
+        Returns:
+            list: Words committed because the buffer was full without agreement (usually empty).
+        """
+        forced = []
+        if self._length + len(samples) > len(self._buffer):
+            # No agreement reached in a full buffer: commit what we have and start over
+            forced = self._hypothesis
+            self._commit(forced)
+            self._trim(self.offset + self._length / self.sample_rate)
+            samples = samples[-len(self._buffer):]
+
+        self._buffer[self._length:self._length + len(samples)] = samples
+        self._length += len(samples)
+        return forced
+
+    def process(self):
+        """
+        Re-decodes the buffer and commits the prefix agreed by the last two hypotheses.
+
+        Returns:
+            tuple: (committed words, tentative words), each word being (start, end, text)
+            with absolute timestamps in seconds.
+        """
+        if self._length == 0:
+            return [], []
+
+        result = self.transcribe_words(self._buffer[:self._length])
+        words = []
+        for chunk in (result or {}).get("chunks", []):
+            start, end = chunk["timestamp"]
+            if end is None:
+                end = self._length / self.sample_rate
+            words.append((self.offset + start, self.offset + end, chunk["text"]))
+        words = self._drop_committed(words)
+
+        agreed = 0
+        for previous, current in zip(self._hypothesis, words):
+            if normalize_word(previous[2]) != normalize_word(current[2]):
+                break
+            agreed += 1
+
+        committed = words[:agreed]
+        self._hypothesis = words[agreed:]
+        if committed:
+            self._commit(committed)
+            self._trim(committed[-1][1])
+        return committed, list(self._hypothesis)
+
+    def finish(self):
+        """Commits and returns the tentative words left at the end of the stream."""
+        remaining = self._hypothesis
+        self._commit(remaining)
+        self._hypothesis = []
+        self._length = 0
+        return remaining
+
+    def _drop_committed(self, words):
+        """Removes the words already committed that the new hypothesis decoded again."""
+        words = [word for word in words if word[0] > self.committed_end - 0.1]
+        # The same words can be re-decoded around the trim point: remove a repeated n-gram
+        for n in range(min(5, len(self._committed_tail), len(words)), 0, -1):
+            tail = [normalize_word(word[2]) for word in self._committed_tail[-n:]]
+            head = [normalize_word(word[2]) for word in words[:n]]
+            if tail == head:
+                return words[n:]
+        return words
+
+    def _commit(self, words):
+        if words:
+            self.committed_end = words[-1][1]
+            self._committed_tail = (self._committed_tail + list(words))[-5:]
+
+    def _trim(self, time):
+        """Drops the audio of the buffer before an absolute time."""
+        cut = min(self._length, max(0, int(round((time - self.offset) * self.sample_rate))))
+        remaining = self._length - cut
+        self._buffer[:remaining] = self._buffer[cut:self._length]
+        self._length = remaining
+        self.offset += cut / self.sample_rate
+        self._hypothesis = [word for word in self._hypothesis if word[1] > time]
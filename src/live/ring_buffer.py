@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Fixed-capacity ring buffer of float32 samples fed from a 16-bit PCM stream.
+
+    The stream is read with readinto into a preallocated staging buffer and the samples are
+    scaled straight into the ring, so no memory is allocated while the stream is running.
+    Positions are absolute sample indexes (since the start of the stream): a window is
+    described by its (start, end) positions and the overlap between windows is kept by index
+    arithmetic instead of copying audio.
+
+    Attributes:
+        capacity (int): Number of samples kept in the ring.
+        written (int): Absolute position of the next sample to be written.
+
+    Methods:
+        fill(stream): Reads one block of the stream into the ring.
+        oldest(): Returns the absolute position of the oldest sample still in the ring.
+        window(start, end): Returns the samples between two absolute positions.
+    """
+
+    def __init__(self, capacity, read_size=4096):
+        self.capacity = int(capacity)
+        self.written = 0
+        self._ring = np.zeros(self.capacity, dtype=np.float32)
+        # Used when a window wraps around the end of the ring
+        self._scratch = np.empty(self.capacity, dtype=np.float32)
+        # Staging buffer for readinto, +1 byte for an odd byte left by a partial read
+        self._raw = bytearray(read_size + 1)
+        self._raw_view = memoryview(self._raw)
+        self._samples = np.frombuffer(self._raw, dtype=np.int16, count=(read_size + 1) // 2)
+        self._carry = 0
+        self._scale = np.float32(1.0 / 32768.0)
+
+    def fill(self, stream):
+        """
+        Reads one block of 16-bit PCM from the stream into the ring.
+
+        Args:
+            stream: Binary stream supporting readinto (e.g. sys.stdin.buffer).
+
+        Returns:
+            int: Number of bytes read, 0 at the end of the stream.
+        """
+        read = stream.readinto(self._raw_view[self._carry:len(self._raw) - 1])
+        if not read:
+            return 0
+
+        total = self._carry + read
+        count = total // 2
+        self._write(self._samples[:count])
+
+        # Keeps the odd byte of a partial read for the next call
+        self._carry = total % 2
+        if self._carry:
+            self._raw[0] = self._raw[total - 1]
+        return read
+
+    def _write(self, samples):
+        """Scales the int16 samples into the ring, wrapping around its end."""
+        count = len(samples)
+        if count > self.capacity:
+            samples = samples[-self.capacity:]
+            self.written += count - self.capacity
+            count = self.capacity
+
+        position = self.written % self.capacity
+        first = min(count, self.capacity - position)
+        np.multiply(samples[:first], self._scale, out=self._ring[position:position + first])
+        if first < count:
+            np.multiply(samples[first:], self._scale, out=self._ring[:count - first])
+        self.written += count
+
+    def oldest(self):
+        """Returns the absolute position of the oldest sample still in the ring."""
+        return max(0, self.written - self.capacity)
+
+    def window(self, start, end, out=None):
+        """
+        Returns the samples between two absolute positions.
+
+        The result is a view on the ring when the window is contiguous, otherwise it is
+        copied into a reused scratch buffer (or into out): it is only valid until the next
+        call to fill or window.
+
+        Args:
+            start (int): Absolute position of the first sample.
+            end (int): Absolute position after the last sample.
+            out (numpy.ndarray, optional): Buffer receiving a copy of the window.
+
+        Returns:
+            numpy.ndarray: float32 samples of the window.
+        """
+        if start < self.oldest() or end > self.written or start > end:
+            raise ValueError(f"Window [{start}, {end}) is not in the ring [{self.oldest()}, {self.written})")
+
+        count = end - start
+        position = start % self.capacity
+        first = min(count, self.capacity - position)
+
+        if first == count and out is None:
+            return self._ring[position:position + count]
+
+        target = (self._scratch if out is None else out)[:count]
+        target[:first] = self._ring[position:position + first]
+        target[first:] = self._ring[:count - first]
+        return target
@@ -0,0 +1,132 @@
+import re
+
+# Compiled once, the cleanup runs on every live window
+PUNCTUATION = re.compile(r"[^\w\s]")
+REPEATED_WORD = re.compile(r"\b(\w+)\s+\1\b", flags=re.IGNORECASE)
+REPEATED_PAIR = re.compile(r"(\b\w+\s+\w+\b)\s+\1", flags=re.IGNORECASE)
+
+
+def normalize_tokens(text):
+    """
+    Splits a text in words and normalises them (lowercase, without punctuation).
+
+    Returns:
+        tuple: (normalised tokens, index in text.split() of each token). Words made only of
+        punctuation have no token.
+    """
+    tokens, positions = [], []
+    for index, word in enumerate(text.split()):
+        token = PUNCTUATION.sub("", word).lower()
+        if token:
+            tokens.append(token)
+            positions.append(index)
+    return tokens, positions
+
+
+def longest_overlap(previous, new):
+    """
+    Length of the longest suffix of previous that is also a prefix of new.
+
+    Knuth-Morris-Pratt: the prefix function of new is computed, then the tail of previous is
+    matched against it, so the cost is linear in the number of tokens.
+
+    Args:
+        previous (list): Tokens of the previous segment.
+        new (list): Tokens of the new segment.
+
+    Returns:
+        int: Number of tokens of new repeated from the end of previous.
+    """
+    if not previous or not new:
+        return 0
+
+    # Prefix function: prefix[i] is the longest proper border of new[:i + 1]
+    prefix = [0] * len(new)
+    border = 0
+    for i in range(1, len(new)):
+        while border and new[i] != new[border]:
+            border = prefix[border - 1]
+        if new[i] == new[border]:
+            border += 1
+        prefix[i] = border
+
+    # A suffix of previous longer than new cannot match
+    matched = 0
+    for token in previous[-len(new):]:
+        while matched and (matched == len(new) or token != new[matched]):
+            matched = prefix[matched - 1]
+        if token == new[matched]:
+            matched += 1
+    return matched
+
+
+class TextCleaner:
+    """Removes the repetitions between consecutive live transcriptions.
+
+    The normalised tokens of the previous segment are kept between calls, so each
+    segment is tokenised only once.
+
+    Methods:
+        clean(new_text): Returns the new text without the overlap with the previous one.
+        reset(): Forgets the previous segment.
+    """
+
+    def __init__(self):
+        self._previous = []
+
+    def clean(self, new_text):
+        """
+        Cleans up a new transcription and remembers it as the previous segment.
+
+        This function performs the following cleanup operations:
+        1. Removes the overlapping text with the previous transcription
+        2. Removes repeated single words ("I I call" → "I call")
+        3. Removes repeated word pairs ("success story success story" → "success story")
+
+        Args:
+            new_text (str): The newly transcribed text segment.
+
+        Returns:
+            str: The cleaned text, with the original punctuation of new_text.
+        """
+        tokens, positions = normalize_tokens(new_text)
+        previous, self._previous = self._previous, tokens
+        if not previous:
+            return new_text  # First pass, nothing to clean.
+
+        words_new = new_text.split()
+        overlap = longest_overlap(previous, tokens)
+        cut = positions[overlap - 1] + 1 if overlap else 0
+
+        # The words are joined with single spaces, no whitespace pass is needed
+        cleaned_text = " ".join(words_new[cut:])
+        cleaned_text = REPEATED_WORD.sub(r"\1", cleaned_text)
+        cleaned_text = REPEATED_PAIR.sub(r"\1", cleaned_text)
+        return cleaned_text.strip()
+
+    def reset(self):
+        """Forgets the previous segment."""
+        self._previous = []
+
+
+def cleanup_text(previous_text, new_text):
+    """
+    Cleans up transcribed text by removing repetitions between consecutive transcriptions and within the same text.
+
+    Stateless version of TextCleaner.clean (the previous text is tokenised on each call).
+
+    Parameters
+    ----------
+    previous_text : str
+        The previously transcribed text segment
+    new_text : str
+        The newly transcribed text segment
+
+    Returns
+    -------
+    str : The cleaned text with repetitions removed and proper spacing
+    """
+    cleaner = TextCleaner()
+    if previous_text:
+        cleaner.clean(previous_text)
+    return cleaner.clean(new_text)
@@ -0,0 +1,94 @@
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services import speech_frames
+
+
+class VadSegmenter:
+    """Cuts the live audio into windows at the pauses detected by the VAD.
+
+    The audio of the ring buffer is analysed by frames as it arrives. A window is cut when it
+    is at least min_window long and ends with a pause, or when it reaches max_window. Windows
+    without any speech frame are skipped instead of being sent to the ASR model.
+
+    Methods:
+        update(ring): Analyses the new audio of the ring and returns the windows to transcribe.
+        flush(ring): Returns the window in progress at the end of the stream, if it has speech.
+        metrics(): Returns the number of windows sent, skipped and the fixed-window equivalent.
+    """
+
+    def __init__(self, sample_rate, min_window_s, max_window_s, pause_s, fixed_window_s, frame_ms=30):
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.min_window = int(min_window_s * sample_rate)
+        self.max_window = int(max_window_s * sample_rate)
+        self.pause = int(pause_s * sample_rate)
+        self.fixed_window = int(fixed_window_s * sample_rate)
+        self.segment_start = 0
+        self.analyzed = 0
+        self._speech_frames = 0
+        self._trailing_silence = 0
+        self._metrics = {"vad_windows": 0, "vad_skipped_silence": 0}
+
+    def update(self, ring):
+        """
+        Analyses the audio added to the ring since the last call.
+
+        Args:
+            ring (AudioRingBuffer): Ring buffer filled by the capture thread.
+
+        Returns:
+            list: Windows (start, end) to transcribe, as absolute sample positions.
+        """
+        windows = []
+        count = (ring.written - self.analyzed) // self.frame_length
+        if count == 0:
+            return windows
+
+        speech = speech_frames(ring.window(self.analyzed, self.analyzed + count * self.frame_length), self.frame_length)
+        for is_speech in speech:
+            self.analyzed += self.frame_length
+            if is_speech:
+                self._speech_frames += 1
+                self._trailing_silence = 0
+            else:
+                self._trailing_silence += self.frame_length
+
+            length = self.analyzed - self.segment_start
+            if (length >= self.min_window and self._trailing_silence >= self.pause) or length >= self.max_window:
+                if self._speech_frames:
+                    windows.append((self.segment_start, self.analyzed))
+                    self._metrics["vad_windows"] += 1
+                else:
+                    self._metrics["vad_skipped_silence"] += 1
+                self.segment_start = self.analyzed
+                self._speech_frames = 0
+                self._trailing_silence = 0
+        return windows
+
+    def flush(self, ring):
+        """
+        Ends the window in progress at the end of the stream, so the last utterance is not lost.
+
+        Args:
+            ring (AudioRingBuffer): Ring buffer filled by the capture thread.
+
+        Returns:
+            tuple or None: The window (start, end) up to the last sample written, None when it
+            has no speech frame.
+        """
+        window = None
+        if self._speech_frames and ring.written > self.segment_start:
+            window = (self.segment_start, ring.written)
+            self._metrics["vad_windows"] += 1
+        elif ring.written > self.segment_start:
+            self._metrics["vad_skipped_silence"] += 1
+        self.segment_start = self.analyzed = ring.written
+        self._speech_frames = 0
+        self._trailing_silence = 0
+        return window
+
+    def metrics(self):
+        """Returns the windows sent and skipped, and the inference calls fixed windows would have used."""
+        metrics = dict(self._metrics)
+        metrics["fixed_windows_equivalent"] = self.analyzed // self.fixed_window
+        return metrics
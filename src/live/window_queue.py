@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+POLICIES = ("drop_oldest", "merge", "skip_silence")
+
+
+class LiveWindow:
+    """Audio window waiting for inference.
+
+    Attributes:
+        samples (numpy.ndarray): float32 samples (view on a pooled buffer).
+        start (int): Absolute position of the first sample in the stream.
+        end (int): Absolute position after the last sample in the stream.
+        capture_time (float): time.time() when the window was captured.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.samples = buffer[:0]
+        self.start = 0
+        self.end = 0
+        self.capture_time = 0.0
+
+
+class WindowQueue:
+    """Bounded queue of audio windows between the capture thread and the inference worker.
+
+    The windows are copied into a pool of preallocated buffers (one per queue slot, plus the
+    one being transcribed), so the capture never allocates. When the queue is full the
+    overload policy decides what happens to the new window:
+        - "drop_oldest": the oldest queued window is dropped.
+        - "merge": the new audio is appended to the newest queued window (if it fits),
+          otherwise the oldest window is dropped.
+        - "skip_silence": the new window is dropped if it is silent, otherwise the oldest one is.
+
+    Methods:
+        put(samples, start, end): Queues a copy of a window (capture thread).
+        get(): Returns the next window, None once closed and drained (inference worker).
+        release(window): Gives the buffer of a transcribed window back to the pool.
+        close(): Signals the end of the stream.
+        metrics(): Returns the queue depth, the lag and the overload counters.
+    """
+
+    def __init__(self, maxsize, window_capacity, policy="drop_oldest", silence_rms=0.01):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overload policy '{policy}', expected one of {POLICIES}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.silence_rms = silence_rms
+        self._free = [LiveWindow(np.empty(window_capacity, dtype=np.float32)) for _ in range(maxsize + 1)]
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._metrics = {"windows": 0, "dropped": 0, "merged": 0, "skipped_silence": 0, "max_depth": 0, "lag": 0.0}
+
+    def put(self, samples, start, end):
+        """
+        Queues a copy of a window, applying the overload policy when the queue is full.
+
+        Args:
+            samples (numpy.ndarray): float32 samples of the window.
+            start (int): Absolute position of the first sample.
+            end (int): Absolute position after the last sample.
+        """
+        with self._cond:
+            self._metrics["windows"] += 1
+
+            if len(self._queue) >= self.maxsize:
+                if self.policy == "merge" and self._merge(samples, start, end):
+                    return
+                if self.policy == "skip_silence" and self._is_silent(samples):
+                    self._metrics["skipped_silence"] += 1
+                    return
+                self._free.append(self._queue.popleft())
+                self._metrics["dropped"] += 1
+
+            window = self._free.pop()
+            count = min(len(samples), len(window.buffer))
+            window.buffer[:count] = samples[len(samples) - count:]
+            window.samples = window.buffer[:count]
+            window.start, window.end = end - count, end
+            window.capture_time = time.time()
+
+            self._queue.append(window)
+            self._metrics["max_depth"] = max(self._metrics["max_depth"], len(self._queue))
+            self._cond.notify()
+
+    def _merge(self, samples, start, end):
+        """Appends the new audio of a window to the newest queued window if it fits."""
+        newest = self._queue[-1]
+        new_audio = samples[max(0, newest.end - start):]
+        count = len(newest.samples)
+        if start > newest.end or count + len(new_audio) > len(newest.buffer):
+            return False
+
+        newest.buffer[count:count + len(new_audio)] = new_audio
+        newest.samples = newest.buffer[:count + len(new_audio)]
+        newest.end = end
+        self._metrics["merged"] += 1
+        return True
+
+    def _is_silent(self, samples):
+        """True when the RMS of the samples is under the silence threshold."""
+        return len(samples) == 0 or float(np.sqrt(np.mean(np.square(samples, dtype=np.float32)))) < self.silence_rms
+
+    def get(self):
+        """
+        Returns the next window, waiting for it if needed.
+
+        Returns:
+            LiveWindow or None: The oldest queued window, None once the queue is closed and empty.
+        """
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            window = self._queue.popleft()
+            self._metrics["lag"] = time.time() - window.capture_time
+            return window
+
+    def release(self, window):
+        """Gives the buffer of a transcribed window back to the pool."""
+        with self._cond:
+            self._free.append(window)
+
+    def close(self):
+        """Signals the end of the stream to the inference worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def metrics(self):
+        """Returns the queue depth, the lag of the last window (seconds) and the overload counters."""
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics["depth"] = len(self._queue)
+        return metrics
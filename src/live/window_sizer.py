@@ -0,0 +1,81 @@
+import math
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services import logger
+
+
+class AdaptiveWindowSizer:
+    """Tunes the live window length from the measured real-time factor of the inference.
+
+    Whisper pads every input to 30 s, so the cost of a call barely depends on the window
+    length. With t the (smoothed) duration of a call and W the window of new audio, a word
+    is sent about W + t after it was spoken, and the stream keeps up as long as t < W.
+    The window is therefore sized from the throughput: t / max_rtf, the shortest window
+    inference keeps up with, clamped between min_window and max_window (the configured
+    live_window_s, so the latency never gets worse than with the fixed window). The target
+    latency is only a ceiling: the window never grows to fill it, and a warning is logged
+    when W + t goes above it.
+
+    Attributes:
+        window_samples (int): Current window length in samples, read by the capture thread.
+
+    Methods:
+        update(elapsed, audio_s): Records an inference and returns the new window length (seconds).
+    """
+
+    def __init__(self, sample_rate, window_s, min_window_s, max_window_s, target_latency_s, max_rtf=0.8, smoothing=0.3):
+        """
+        Args:
+            sample_rate (int): Sample rate of the stream.
+            window_s (float): Initial window length, in seconds.
+            min_window_s (float): Shortest window, in seconds.
+            max_window_s (float): Longest window, in seconds (the configured fixed window).
+            target_latency_s (float): Wanted delay between speech and its transcription, in seconds.
+            max_rtf (float, optional): Highest real-time factor accepted on the new audio. Defaults to 0.8.
+            smoothing (float, optional): Weight of the last call in the moving average. Defaults to 0.3.
+        """
+        self.sample_rate = sample_rate
+        self.min_window_s = min_window_s
+        self.max_window_s = max_window_s
+        self.target_latency_s = target_latency_s
+        self.max_rtf = max_rtf
+        self.smoothing = smoothing
+        self.window_s = min(max(window_s, min_window_s), max_window_s)
+        self.window_samples = int(self.window_s * sample_rate)
+        self.inference_s = None
+
+    def update(self, elapsed, audio_s):
+        """
+        Records the duration of an inference call and resizes the window.
+
+        Args:
+            elapsed (float): Duration of the call, in seconds.
+            audio_s (float): Duration of the audio transcribed by the call (with the overlap), in seconds.
+
+        Returns:
+            float: The window length to use for the next windows, in seconds.
+        """
+        if self.inference_s is None:
+            self.inference_s = elapsed
+        else:
+            self.inference_s += self.smoothing * (elapsed - self.inference_s)
+
+        keep_up_s = self.inference_s / self.max_rtf
+        # 0.1 s steps (rounded up, so inference still keeps up), so the window does not change on every call
+        window_s = min(max(math.ceil(round(keep_up_s * 10, 6)) / 10, self.min_window_s), self.max_window_s)
+
+        if window_s != self.window_s:
+            rtf = elapsed / audio_s if audio_s else 0.0
+            logger.info(
+                f"Live window {self.window_s:.1f}s -> {window_s:.1f}s "
+                f"(inference {self.inference_s:.2f}s, RTF {rtf:.2f}, "
+                f"expected latency {window_s + self.inference_s:.2f}s for a target of {self.target_latency_s:.2f}s)"
+            )
+            if keep_up_s > window_s:
+                logger.warning(f"Inference takes {self.inference_s:.2f}s per window: the live transcription cannot keep up")
+            elif window_s + self.inference_s > self.target_latency_s:
+                logger.warning(f"Expected latency {window_s + self.inference_s:.2f}s above the target of {self.target_latency_s:.2f}s")
+            self.window_s = window_s
+            self.window_samples = int(window_s * self.sample_rate)
+        return self.window_s
@@ -1,5 +1,7 @@
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import find_dotenv, load_dotenv
 from langchain_ollama import OllamaLLM
 
@@ -9,8 +11,70 @@ from .remove_think import remove_think_tags
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from config import config
 from .logger_service import logger
+from .llm_cache import cached_invoke, log_llm_cache_stats
 
 
+def invoke_with_retry(model, prompt, temperature, retries=None):
+    """
+    Calls the LLM through the response cache, retrying a failed call with an exponential backoff.
+
+    Args:
+        model (OllamaLLM): The LLM model instance.
+        prompt (str): The prompt.
+        temperature (float): LLM generation temperature.
+        retries (int, optional): Number of retries (config "llm_retries", 2).
+
+    Returns:
+        str: The response of the model.
+
+    Raises:
+        Exception: The error of the last attempt.
+    """
+    retries = config.get("llm_retries", 2) if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            return cached_invoke(model, prompt, temperature)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"LLM call failed ({e}), retry {attempt + 1}/{retries}")
+            time.sleep(config.get("llm_retry_backoff_s", 1.0) * 2 ** attempt)
+
+
+def invoke_many(model, prompts, temperature, max_in_flight=None, retries=None, fallbacks=None):
+    """
+    Sends independent prompts to the LLM concurrently and returns the responses in order.
+
+    At most max_in_flight requests are sent at the same time (Ollama serves them in
+    parallel up to its OLLAMA_NUM_PARALLEL setting). Each failed request is retried, and a
+    request failing every attempt does not abort the others: its fallback is returned instead.
+
+    Args:
+        model (OllamaLLM): The LLM model instance.
+        prompts (list): The prompts.
+        temperature (float): LLM generation temperature.
+        max_in_flight (int, optional): Maximum concurrent requests (config "llm_max_in_flight", 4).
+        retries (int, optional): Number of retries of a failed request (config "llm_retries", 2).
+        fallbacks (list, optional): Result of each prompt when all its attempts fail. Defaults to "".
+
+    Returns:
+        list: The responses, in the order of the prompts.
+    """
+    max_in_flight = config.get("llm_max_in_flight", 4) if max_in_flight is None else max_in_flight
+    fallbacks = fallbacks or [""] * len(prompts)
+
+    def call(index):
+        try:
+            return invoke_with_retry(model, prompts[index], temperature, retries)
+        except Exception as e:
+            logger.error(f"LLM request {index + 1}/{len(prompts)} failed after retries: {e}")
+            return fallbacks[index]
+
+    if not prompts:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(prompts)))) as executor:
+        return list(executor.map(call, range(len(prompts))))
+
 
 def transcription_post_process(
     transcription_file_path,
@@ -80,8 +144,8 @@ def transcription_post_process(
 
         logger.info(f"Prompt '{prompt_name}' applied successfully.")
 
-        # Appel à l'API Ollama
-        ollama_response = model.invoke(input=prompt, config={"temperature": temperature})
+        # Appel à l'API Ollama (ou réponse en cache)
+        ollama_response = cached_invoke(model, prompt, temperature)
         logger.debug(f"Ollama response (first 100 chars): {ollama_response[:100]}")
 
         # Sauvegarde du résultat
@@ -174,6 +238,7 @@ def start_post_process(write_in_file_auto_correction, file_path, file_name, deep
         transcription_post_process(file_path, model,file_name,OLLAMA_MODEL,"correction_prompt_fr",True,0.7,additional_feedback=feedback,summary=summary,deepseek=deepseek)
 
         logger.info(f"Post-processing completed successfully. Output: {file_path}")
+        log_llm_cache_stats()
         return 0
 
     except Exception as e:
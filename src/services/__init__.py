@@ -1,10 +1,14 @@
 from .file_service import (create_output_file, load_audio,
                            write_in_output_formated, write_in_output_raw, save_transcriptions, cleanup_transcriptions, md_2_docx)
 from .json_service import list_available_prompts, load_prompt
-from .LLM_service import start_post_process, transcription_post_process
+from .llm_cache import cached_invoke, llm_cache, log_llm_cache_stats
+from .LLM_service import invoke_many, invoke_with_retry, start_post_process, transcription_post_process
 from .logger_service import logger
-from .audio_service import convert_audio_to_wav,process_audio_for_whisper
+from .audio_service import decode_audio,process_audio_for_whisper,stream_audio_blocks
+from .audio_cache import convert_audio_to_wav,get_decoded_audio,iter_audio_blocks
 from .remove_think import remove_think_tags
+from .vad_service import is_silent, speech_frames, speech_regions, split_at_pauses
+from .live_protocol import EventWriter, decode_command, decode_event, encode_command
 
 
 # expose all the following function
@@ -18,11 +22,28 @@ __all__ = [
     "load_prompt",
     "list_available_prompts",
     "start_post_process",
+    "invoke_many",
+    "invoke_with_retry",
+    "cached_invoke",
+    "llm_cache",
+    "log_llm_cache_stats",
     "logger",
     "convert_audio_to_wav",
+    "decode_audio",
+    "get_decoded_audio",
+    "iter_audio_blocks",
+    "stream_audio_blocks",
     "process_audio_for_whisper",
     "save_transcriptions",
     "cleanup_transcriptions",
     "remove_think_tags",
+    "is_silent",
+    "speech_frames",
+    "speech_regions",
+    "split_at_pauses",
+    "EventWriter",
+    "decode_event",
+    "encode_command",
+    "decode_command",
     "md_2_docx"
 ]
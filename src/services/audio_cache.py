@@ -0,0 +1,195 @@
+import os, sys
+import hashlib
+import wave
+import numpy as np
+from .logger_service import logger
+from .audio_service import decode_audio, probe_audio_format, read_wav, stream_audio_blocks
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config import config
+
+CACHE_DIR = os.path.join(config.get("cache_dir", "./cache"), "audio")
+
+
+def file_hash(file_path, block_size=1 << 20):
+    """
+    Computes the sha256 of a file, reading it by blocks.
+
+    Args:
+        file_path (str): Path to the file.
+        block_size (int, optional): Size of the blocks read. Defaults to 1 MB.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def audio_cache_path(file_path, target_rate=16000, extension="npy"):
+    """Returns the path of the cache entry of an audio file (content-addressed)."""
+    return os.path.join(CACHE_DIR, f"{file_hash(file_path)}_{target_rate}.{extension}")
+
+
+def read_direct(file_path, target_rate=16000):
+    """Returns the samples of a WAV file readable without decoder, None for the other files."""
+    try:
+        if probe_audio_format(file_path) == "wav":
+            return read_wav(file_path, target_rate)
+    except Exception as e:
+        logger.warning(f"Unable to read {file_path} directly, falling back to the decoder: {e}")
+    return None
+
+
+def get_decoded_audio(file_path, target_rate=16000):
+    """
+    Returns the mono float32 PCM of an audio file, decoding it only once.
+
+    The decoded samples are stored as .npy under the cache directory, keyed by the
+    content hash of the file, and memory-mapped on later reads.
+
+    Args:
+        file_path (str): Path to the audio file.
+        target_rate (int, optional): Target sample rate. Defaults to 16000.
+
+    Returns:
+        numpy.ndarray or None: The samples (a memory map on a cache hit), None if decoding fails.
+    """
+    # WAV files at the target rate are read in place, there is nothing to cache
+    waveform = read_direct(file_path, target_rate)
+    if waveform is not None:
+        return waveform
+
+    cache_path = audio_cache_path(file_path, target_rate)
+
+    if os.path.exists(cache_path):
+        try:
+            # Touch the entry so that the eviction keeps recently used files
+            os.utime(cache_path)
+            logger.info(f"Decoded audio loaded from cache: {cache_path}")
+            return np.load(cache_path, mmap_mode="c")
+        except Exception as e:
+            logger.error(f"Error reading cached audio {cache_path}: {e}", exc_info=True)
+
+    waveform = decode_audio(file_path, target_rate)
+    if waveform is None:
+        return None
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + ".tmp.npy"
+        np.save(tmp_path, waveform)
+        os.replace(tmp_path, cache_path)
+        logger.info(f"Decoded audio saved in cache: {cache_path}")
+        evict_audio_cache()
+    except Exception as e:
+        logger.error(f"Error saving decoded audio in cache: {e}", exc_info=True)
+
+    return waveform
+
+
+def iter_audio_blocks(file_path, block_seconds=300, target_rate=16000):
+    """
+    Iterates over the mono float32 PCM of an audio file by fixed-size blocks.
+
+    Already decoded files are read from the memory-mapped cache entry, the others are
+    streamed from ffmpeg, so the memory used stays bounded by the block size.
+
+    Args:
+        file_path (str): Path to the audio file.
+        block_seconds (float, optional): Duration of a block in seconds. Defaults to 300.
+        target_rate (int, optional): Target sample rate. Defaults to 16000.
+
+    Yields:
+        numpy.ndarray: The samples of each block.
+    """
+    samples = read_direct(file_path, target_rate)
+    cache_path = audio_cache_path(file_path, target_rate) if samples is None else None
+
+    if cache_path is not None and os.path.exists(cache_path):
+        os.utime(cache_path)
+        samples = np.load(cache_path, mmap_mode="r")
+
+    if samples is not None:
+        block_samples = int(block_seconds * target_rate)
+        for start in range(0, len(samples), block_samples):
+            yield samples[start:start + block_samples]
+        return
+
+    yield from stream_audio_blocks(file_path, block_seconds, target_rate)
+
+
+def convert_audio_to_wav(input_file, output_wav_file=None, target_rate=16000):
+    """Convert an audio file to WAV format with specific parameters.
+    This function takes an input audio file and converts it to WAV format with
+    specified sampling rate and mono channel. If no output filename is provided,
+    the WAV is stored in the audio cache (keyed by the content hash of the input)
+    and reused on later calls, instead of being written next to the input file.
+    Args:
+        input_file (str): Path to the input audio file
+        output_wav_file (str, optional): Path for the output WAV file. Defaults to None.
+        target_rate (int, optional): Target sampling rate in Hz. Defaults to 16000.
+    Returns:
+        str or None: Path to the converted WAV file if successful, None if conversion fails.
+    """
+    try:
+        if output_wav_file is None:
+            output_wav_file = audio_cache_path(input_file, target_rate, "wav")
+            if os.path.exists(output_wav_file):
+                os.utime(output_wav_file)
+                return output_wav_file
+
+        logger.info(f"Conversion de {input_file} en WAV (Mono, {target_rate}Hz)...")
+
+        waveform = get_decoded_audio(input_file, target_rate)
+        if waveform is None:
+            return None
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_wav_file)), exist_ok=True)
+        samples = np.clip(waveform * 32768.0, -32768, 32767).astype(np.int16)
+        with wave.open(output_wav_file, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(target_rate)
+            f.writeframes(samples.tobytes())
+
+        logger.info(f"Conversion terminée : {input_file} → {output_wav_file} ({target_rate} Hz, mono)")
+        return output_wav_file
+
+    except Exception as e:
+        logger.error(f"Erreur lors de la conversion de {input_file} : {e}", exc_info=True)
+        return None
+
+
+def evict_audio_cache(max_bytes=None):
+    """
+    Removes the least recently used entries until the cache fits in max_bytes.
+
+    Args:
+        max_bytes (int, optional): Size budget in bytes (config "audio_cache_max_gb").
+    """
+    if max_bytes is None:
+        max_bytes = int(float(config.get("audio_cache_max_gb", 5)) * 1024**3)
+    if not max_bytes or not os.path.isdir(CACHE_DIR):
+        return
+
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            logger.info(f"Audio cache entry evicted: {path}")
+        except OSError as e:
+            logger.warning(f"Unable to evict audio cache entry {path}: {e}")
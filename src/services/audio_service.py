@@ -1,54 +1,242 @@
 from .logger_service import logger
 import torch
 import os
+import struct
+import subprocess
+import tempfile
+from functools import lru_cache
+from math import gcd
 from pydub import AudioSegment
 import numpy as np
-from librosa import resample
+from scipy.signal import firwin, resample_poly
 
-def convert_audio_to_wav(input_file, output_wav_file=None, target_rate=16000):
-    """Convert an audio file to WAV format with specific parameters.
-    This function takes an input audio file and converts it to WAV format with
-    specified sampling rate and mono channel. If no output filename is provided,
-    it will use the same name as input file with .wav extension.
+# WAVE_FORMAT_PCM / WAVE_FORMAT_IEEE_FLOAT sample types that can be read without decoding
+WAV_DTYPES = {(1, 16): "<i2", (1, 32): "<i4", (3, 32): "<f4"}
+
+def probe_audio_format(input_file):
+    """Detect the container of an audio file from its first bytes.
+    Args:
+        input_file (str): Path to the input audio file
+    Returns:
+        str or None: ffmpeg format name ("wav", "mp3", "flac", "ogg", "mp4"), None if unknown.
+    """
+    with open(input_file, "rb") as f:
+        header = f.read(12)
+
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[4:8] == b"ftyp":
+        return "mp4"
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+def read_wav(input_file, target_rate=16000):
+    """Read a PCM/float WAV file directly, without any decoder.
+    The samples are memory-mapped from the data chunk. float32 mono files are returned
+    as is (zero copy), integer files are scaled into a single float32 array.
+    Args:
+        input_file (str): Path to the input WAV file
+        target_rate (int, optional): Expected sampling rate in Hz. Defaults to 16000.
+    Returns:
+        numpy.ndarray or None: Mono float32 samples in [-1, 1], None if the file needs
+        a decoder (compressed, other sample rate or unsupported sample type).
+    """
+    with open(input_file, "rb") as f:
+        if f.read(12)[8:12] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+            if chunk_id == b"fmt ":
+                chunk = f.read(chunk_size)
+                audio_format, channels, sample_rate = struct.unpack("<HHI", chunk[:8])
+                bits = struct.unpack("<H", chunk[14:16])[0]
+                if audio_format == 0xFFFE and chunk_size >= 26:  # WAVE_FORMAT_EXTENSIBLE
+                    audio_format = struct.unpack("<H", chunk[24:26])[0]
+                fmt = (audio_format, channels, sample_rate, bits)
+            elif chunk_id == b"data":
+                data_offset = f.tell()
+                data_size = chunk_size
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+    if fmt is None:
+        return None
+    audio_format, channels, sample_rate, bits = fmt
+    dtype = WAV_DTYPES.get((audio_format, bits))
+    if dtype is None or sample_rate != target_rate:
+        return None
+
+    # The data chunk can be followed by other chunks (LIST...), so its size is used. Streamed
+    # WAV files leave it at 0 or 0xFFFFFFFF (or wrong): the file size is used instead
+    available = os.path.getsize(input_file) - data_offset
+    if data_size in (0, 0xFFFFFFFF) or data_size > available:
+        data_size = available
+    itemsize = np.dtype(dtype).itemsize
+    frames = data_size // (itemsize * channels)
+    samples = np.memmap(input_file, dtype=dtype, mode="c", offset=data_offset, shape=(frames, channels))
+
+    if dtype == "<f4" and channels == 1:
+        return samples.reshape(-1)
+
+    waveform = np.empty(frames, dtype=np.float32)
+    if channels == 1:
+        np.multiply(samples[:, 0], np.float32(-1.0 / np.iinfo(dtype).min), out=waveform)
+    else:
+        # downmix and scale in place in the output buffer
+        np.sum(samples, axis=1, dtype=np.float32, out=waveform)
+        scale = 1.0 / channels if dtype == "<f4" else -1.0 / (channels * np.iinfo(dtype).min)
+        waveform *= np.float32(scale)
+    return waveform
+
+def decode_audio(input_file, target_rate=16000):
+    """Decode an audio file once into a 16kHz mono float32 waveform.
+    The container is detected by probing the file. WAV files already at the target
+    rate are read directly (memory map), the other files are decoded with pydub and
+    their samples scaled into a single float32 array, so speaker turns can then be
+    cut as slices of it.
     Args:
         input_file (str): Path to the input audio file
-        output_wav_file (str, optional): Path for the output WAV file. Defaults to None.
         target_rate (int, optional): Target sampling rate in Hz. Defaults to 16000.
     Returns:
-        str or None: Path to the converted WAV file if successful, None if conversion fails.
+        numpy.ndarray or None: Mono float32 samples in [-1, 1], None if decoding fails.
     """
-    
     try:
-        if output_wav_file is None:
-            output_wav_file = os.path.splitext(input_file)[0] + ".wav"
+        audio_format = probe_audio_format(input_file)
 
-        logger.info(f"Conversion de {input_file} en WAV (Mono, {target_rate}Hz)...")
+        # WAV already at the target rate: no ffmpeg round-trip
+        if audio_format == "wav":
+            waveform = read_wav(input_file, target_rate)
+            if waveform is not None:
+                logger.info(f"WAV lu directement : {input_file} ({len(waveform) / target_rate:.2f} s)")
+                return waveform
 
-        # Charger le fichier audio (Pydub gère plusieurs formats)
-        audio = AudioSegment.from_file(input_file)
+        logger.info(f"Décodage de {input_file} ({audio_format}, Mono, {target_rate}Hz)...")
 
-        # Convertir en mono et ajuster le taux d'échantillonnage
-        audio = audio.set_frame_rate(target_rate).set_channels(1)
+        # Charger le fichier audio (Pydub gère plusieurs formats)
+        audio = AudioSegment.from_file(input_file, format=audio_format)
+        audio = audio.set_frame_rate(target_rate).set_channels(1).set_sample_width(2)
 
-        # Exporter en WAV
-        audio.export(output_wav_file, format="wav")
+        samples = np.frombuffer(audio.raw_data, dtype=np.int16)
+        waveform = np.empty(samples.shape, dtype=np.float32)
+        np.multiply(samples, np.float32(1 / 32768.0), out=waveform)
 
-        logger.info(f"Conversion terminée : {input_file} → {output_wav_file} ({target_rate} Hz, mono)")
-        return output_wav_file
+        logger.info(f"Décodage terminé : {input_file} ({len(waveform) / target_rate:.2f} s)")
+        return waveform
 
     except Exception as e:
-        logger.error(f"Erreur lors de la conversion de {input_file} : {e}", exc_info=True)
+        logger.error(f"Erreur lors du décodage de {input_file} : {e}", exc_info=True)
         return None
 
+def stream_audio_blocks(input_file, block_seconds=300, target_rate=16000):
+    """Decode an audio file as a stream of fixed-size 16kHz mono float32 blocks.
+    ffmpeg decodes the file into a pipe which is read with readinto into a single
+    preallocated buffer, so the peak memory is bounded by the block size whatever
+    the duration of the recording.
+    Args:
+        input_file (str): Path to the input audio file
+        block_seconds (float, optional): Duration of a block in seconds. Defaults to 300.
+        target_rate (int, optional): Target sampling rate in Hz. Defaults to 16000.
+    Yields:
+        numpy.ndarray: float32 samples of the block (the last one may be shorter).
+        The array is a view on the reused buffer: it is only valid until the next block.
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the file (with its error output).
+    """
+    block_samples = int(block_seconds * target_rate)
+    buffer = bytearray(block_samples * 4)
+    view = memoryview(buffer)
+
+    # ffmpeg errors go to a temporary file: a stderr pipe left unread could block ffmpeg
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(
+            ["ffmpeg", "-nostdin", "-v", "error", "-i", input_file,
+             "-f", "f32le", "-ac", "1", "-ar", str(target_rate), "-"],
+            stdout=subprocess.PIPE,
+            stderr=errors,
+        )
+        try:
+            while True:
+                # A pipe read can be partial: fill the whole block before yielding it
+                filled = 0
+                while filled < len(buffer):
+                    read = process.stdout.readinto(view[filled:])
+                    if not read:
+                        break
+                    filled += read
+
+                if filled:
+                    yield np.frombuffer(buffer, dtype=np.float32, count=filled // 4)
+                if filled < len(buffer):
+                    break
+
+            # End of the output: a decoding failure must not pass for an empty file
+            if process.wait() != 0:
+                errors.seek(0)
+                message = errors.read().decode("utf-8", errors="replace").strip()
+                logger.error(f"ffmpeg failed to decode {input_file} (code {process.returncode}): {message}")
+                raise RuntimeError(f"ffmpeg failed to decode {input_file}: {message}")
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+@lru_cache(maxsize=None)
+def polyphase_filter(orig_sr, target_sr):
+    """
+    Design (once per pair of rates) the polyphase low-pass filter used to resample.
+
+    Args:
+        orig_sr (int): Sample rate of the input audio in Hz
+        target_sr (int): Sample rate of the output audio in Hz
+
+    Returns:
+        tuple: (up factor, down factor, float32 FIR coefficients)
+    """
+    divisor = gcd(int(orig_sr), int(target_sr))
+    up, down = int(target_sr) // divisor, int(orig_sr) // divisor
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    taps = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    return up, down, taps.astype(np.float32)
+
+def resample_audio(waveform, orig_sr, target_sr=16000):
+    """
+    Resample a float32 mono waveform with the cached polyphase filter.
+
+    Args:
+        waveform (numpy.ndarray): float32 mono waveform
+        orig_sr (int): Sample rate of the input audio in Hz
+        target_sr (int, optional): Sample rate of the output audio in Hz. Defaults to 16000.
+
+    Returns:
+        numpy.ndarray: float32 resampled waveform
+    """
+    if orig_sr == target_sr:
+        return waveform
+    up, down, taps = polyphase_filter(orig_sr, target_sr)
+    return resample_poly(waveform, up, down, window=taps).astype(np.float32, copy=False)
+
 def process_audio_for_whisper(waveform, sample_rate):
     """
     Process and normalize audio waveform for Whisper model input.
 
-    This function performs several preprocessing steps on the audio waveform:
-    1. Converts PyTorch tensor to numpy array if needed
+    This function performs several preprocessing steps on the audio waveform, all in float32:
+    1. Converts PyTorch tensor to numpy array if needed (no copy)
     2. Converts stereo to mono if needed
-    3. Resamples to 16kHz if needed
-    4. Normalizes the waveform amplitude
+    3. Resamples to 16kHz if needed, with a polyphase filter cached per rate pair
+    4. Normalizes the waveform amplitude (in place when a new buffer was produced,
+       skipped on silent segments)
 
     Args:
         waveform (Union[torch.Tensor, numpy.ndarray]): Input audio waveform
@@ -62,23 +250,34 @@ def process_audio_for_whisper(waveform, sample_rate):
         Exception: If any error occurs during processing
     """
     try:
+        if isinstance(waveform, torch.Tensor):
+            waveform = waveform.numpy()
+
         if waveform.size == 0:
             logger.warning(f"⚠️ Segment vide détecté ({sample_rate} Hz), passage au suivant...")
             return None
 
-        if isinstance(waveform, torch.Tensor):
-            waveform = waveform.numpy()
+        # True when waveform is a new buffer that can be modified in place
+        owned = False
 
         if waveform.ndim > 1:
-            waveform = np.mean(waveform, axis=0)
+            waveform = np.mean(waveform, axis=0, dtype=np.float32)
+            owned = True
 
         if sample_rate != 16000:
-            waveform = resample(waveform, orig_sr=sample_rate, target_sr=16000)
+            waveform = resample_audio(np.asarray(waveform, dtype=np.float32), sample_rate, 16000)
+            owned = True
 
-        waveform = waveform.astype(np.float32)
-        waveform = waveform / np.max(np.abs(waveform))
+        peak = max(float(waveform.max()), -float(waveform.min()))
+        if peak == 0.0:
+            logger.debug("Segment silencieux, normalisation ignorée.")
+            return waveform.astype(np.float32, copy=not owned)
 
-        return waveform
+        scale = np.float32(1.0 / peak)
+        if owned and waveform.dtype == np.float32:
+            waveform *= scale
+            return waveform
+        return np.multiply(waveform, scale, dtype=np.float32)
 
     except Exception as e:
         logger.error(f"Error processing audio for Whisper: {e}", exc_info=True)
@@ -1,10 +1,9 @@
 import os
 import pypandoc
 import sys
-import numpy as np
 from dotenv import load_dotenv
-from pydub import AudioSegment
 from .logger_service import logger
+from .audio_cache import get_decoded_audio
 
 load_dotenv()
 OUTPUT_DIR = os.getenv("OUTPUT_DIR")
@@ -96,7 +95,9 @@ def write_in_output_formated(result, output_file):
 
 def load_audio(file_path, target_rate=16000):
     """
-    Loads an MP3 audio file and converts it into a numpy tensor.
+    Loads an audio file and converts it into a numpy tensor.
+    The decoded samples come from the shared decoded-audio cache, so a file is only
+    decoded once whatever the entry point.
 
     Args:
         file_path (str): Path to the audio file.
@@ -112,19 +113,15 @@ def load_audio(file_path, target_rate=16000):
             logger.error(f"Audio file not found: {file_path}")
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        # Load the audio file
-        audio = AudioSegment.from_file(file_path, format="mp3")
-        duration = audio.duration_seconds
+        # Load the audio file (16kHz mono float32, normalized)
+        samples = get_decoded_audio(file_path, target_rate)
+        if samples is None:
+            raise ValueError(f"Unable to decode the audio file: {file_path}")
+        duration = len(samples) / target_rate
 
         if duration == 0:
             logger.warning(f"Audio file {file_path} seems to be empty!")
 
-        # Convert to 16kHz mono
-        audio = audio.set_frame_rate(target_rate).set_channels(1)
-
-        # Normalize and convert to numpy
-        samples = np.array(audio.get_array_of_samples(), dtype=np.float32) / 32768.0
-
         logger.info(f"Audio file {file_path} loaded successfully. Duration: {duration:.2f} seconds")
         return samples, duration
 
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+
+# Version of the event format, sent with every event
+PROTOCOL_VERSION = 1
+
+EVENT_TYPES = ("status", "segment", "metrics")
+
+# Commands sent by the interface to the live worker, one JSON line each on its stdin
+COMMANDS = ("start", "stop", "language", "shutdown")
+
+
+class EventWriter:
+    """Writes the live transcription events as JSON lines (one event per line).
+
+    Every event carries the protocol version "v", a sequence number "seq", its "type" and the
+    time it was emitted "emit_time" (time.time()). A segment event also carries:
+        - "id": Segment id. A partial segment is replaced by the next event with the same id.
+        - "text": Text of the segment.
+        - "audio_start" / "audio_end": Position of the segment in the stream, in seconds.
+        - "capture_time": time.time() when its audio was captured, to measure the latency.
+        - "final": False for a partial (revisable) hypothesis, True once the text is final.
+
+    Methods:
+        status(text): Sends a status message.
+        segment(segment_id, text, audio_start, audio_end, capture_time, final=True): Sends a segment.
+        metrics(metrics): Sends the live metrics.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def _write(self, event_type, fields):
+        with self._lock:
+            event = {"v": PROTOCOL_VERSION, "seq": self._seq, "type": event_type, "emit_time": time.time()}
+            event.update(fields)
+            self._seq += 1
+            self.stream.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self.stream.flush()
+
+    def status(self, text):
+        """Sends a status message (model loading, ready, errors...)."""
+        self._write("status", {"text": text})
+
+    def segment(self, segment_id, text, audio_start, audio_end, capture_time, final=True):
+        """
+        Sends the text of a segment.
+
+        Args:
+            segment_id (int): Id of the segment, the same id is used for its revisions.
+            text (str): Text of the segment.
+            audio_start (float): Start of the segment in the stream, in seconds.
+            audio_end (float): End of the segment in the stream, in seconds.
+            capture_time (float): time.time() when the audio of the segment was captured.
+            final (bool, optional): False for a partial hypothesis. Defaults to True.
+        """
+        self._write("segment", {
+            "id": segment_id,
+            "text": text,
+            "audio_start": round(audio_start, 3),
+            "audio_end": round(audio_end, 3),
+            "capture_time": capture_time,
+            "final": final,
+        })
+
+    def metrics(self, metrics):
+        """Sends the live metrics (queue depth, lag, window length...)."""
+        self._write("metrics", {"metrics": metrics})
+
+
+def decode_event(line):
+    """
+    Decodes one line received from the live process.
+
+    Lines that are not events (e.g. a stray print) are returned as status messages.
+
+    Args:
+        line (str): Line read from the live process.
+
+    Returns:
+        dict or None: The event, None for an empty line.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return {"type": "status", "text": line}
+    if not isinstance(event, dict) or event.get("type") not in EVENT_TYPES:
+        return {"type": "status", "text": line}
+    return event
+
+
+def encode_command(command, **fields):
+    """
+    Encodes a command for the live worker.
+
+    Args:
+        command (str): One of COMMANDS.
+        **fields: Arguments of the command (e.g. device, language).
+
+    Returns:
+        str: The command as a JSON line.
+    """
+    if command not in COMMANDS:
+        raise ValueError(f"Unknown live command '{command}', expected one of {COMMANDS}")
+    return json.dumps({"cmd": command, **fields}, ensure_ascii=False) + "\n"
+
+
+def decode_command(line):
+    """
+    Decodes a command received by the live worker.
+
+    Returns:
+        dict or None: The command, None for an empty or invalid line.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        command = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(command, dict) or command.get("cmd") not in COMMANDS:
+        return None
+    return command
@@ -0,0 +1,214 @@
+import os, sys
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from .logger_service import logger
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config import config
+
+CACHE_PATH = os.path.join(config.get("cache_dir", "./cache"), "llm_cache.sqlite")
+
+# "deterministic" caches the temperature 0 calls only, "all" every call, "off" none
+CACHE_MODES = ("deterministic", "all", "off")
+
+# Generation options of OllamaLLM, sent to Ollama with every call
+OLLAMA_OPTIONS = (
+    "mirostat", "mirostat_eta", "mirostat_tau", "num_ctx", "num_gpu", "num_thread", "num_predict",
+    "repeat_last_n", "repeat_penalty", "temperature", "seed", "stop", "tfs_z", "top_k", "top_p",
+)
+
+
+def llm_cache_key(model_name, prompt, temperature, num_ctx):
+    """
+    Builds the cache key of an LLM call.
+
+    Args:
+        model_name (str): Name of the Ollama model.
+        prompt (str): The rendered prompt.
+        temperature (float): LLM generation temperature.
+        num_ctx (int): Context size of the model.
+
+    Returns:
+        str: sha256 of (model, sha256 of the prompt, temperature, num_ctx).
+    """
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    payload = json.dumps([model_name, prompt_hash, float(temperature), num_ctx])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def ollama_options(model, temperature):
+    """
+    Builds the Ollama generation options of a call: the options of the model with the call temperature.
+
+    OllamaLLM ignores a temperature given in the invoke config, and "options" passed to invoke
+    replace all the options of the model, so they are copied from it.
+
+    Args:
+        model (OllamaLLM): The LLM model instance.
+        temperature (float): LLM generation temperature.
+
+    Returns:
+        dict: The options to pass to model.invoke.
+    """
+    options = {name: getattr(model, name, None) for name in OLLAMA_OPTIONS}
+    options["temperature"] = temperature
+    return options
+
+
+def invoke_llm(model, prompt, temperature):
+    """Calls the model with the given temperature (without the cache)."""
+    return model.invoke(prompt, options=ollama_options(model, temperature))
+
+
+class LLMCache:
+    """On-disk (SQLite) cache of the LLM responses.
+
+    The responses are stored under llm_cache_key(model, prompt, temperature, num_ctx). The least
+    recently used responses are deleted when the number of entries or their total size exceeds
+    the configured limits. The cache is shared by the threads of invoke_many.
+
+    Attributes:
+        path (str): Path of the SQLite database.
+        max_entries (int): Maximum number of responses kept (0 means unlimited).
+        max_bytes (int): Maximum total size of the responses in bytes (0 means unlimited).
+
+    Methods:
+        get(key): Returns the cached response or None.
+        put(key, model_name, temperature, num_ctx, response): Stores a response.
+        clear(): Deletes every response.
+        get_stats(): Returns the hit/miss counters, the hit rate and the cache size.
+    """
+
+    def __init__(self, path, max_entries=0, max_bytes=0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = None
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _connect(self):
+        """Opens the database on first use."""
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, temperature REAL, num_ctx INTEGER, "
+                "response TEXT, size INTEGER, created REAL, last_used REAL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._connection.commit()
+        return self._connection
+
+    def get(self, key):
+        """Returns the response cached under key, None on a miss."""
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            connection.commit()
+            self._stats["hits"] += 1
+            return row[0]
+
+    def put(self, key, model_name, temperature, num_ctx, response):
+        """Stores a response and enforces the size limits."""
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model_name, float(temperature), num_ctx, response, len(response.encode("utf-8")), now, now),
+            )
+            self._enforce_limits(connection)
+            connection.commit()
+
+    def _enforce_limits(self, connection):
+        """Deletes the least recently used responses until the limits are respected."""
+        if not self.max_entries and not self.max_bytes:
+            return
+        count, total = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or total <= self.max_bytes):
+            return
+
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or total <= self.max_bytes):
+                break
+            evicted.append((key,))
+            count -= 1
+            total -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._stats["evictions"] += len(evicted)
+        logger.debug(f"LLM cache: {len(evicted)} responses evicted")
+
+    def clear(self):
+        """Deletes every cached response."""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+
+    def get_stats(self):
+        """Returns the hit/miss/eviction counters, the hit rate and the size of the cache."""
+        with self._lock:
+            stats = dict(self._stats)
+            count, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = count
+        stats["bytes"] = total
+        return stats
+
+
+def cached_invoke(model, prompt, temperature, mode=None):
+    """
+    Calls model.invoke through the LLM response cache.
+
+    Args:
+        model (OllamaLLM): The LLM model instance.
+        prompt (str): The rendered prompt.
+        temperature (float): LLM generation temperature.
+        mode (str, optional): One of CACHE_MODES (config "llm_cache_mode", "deterministic").
+
+    Returns:
+        str: The cached or generated response.
+    """
+    mode = config.get("llm_cache_mode", "deterministic") if mode is None else mode
+    if mode == "off" or (mode == "deterministic" and temperature != 0):
+        return invoke_llm(model, prompt, temperature)
+
+    model_name = getattr(model, "model", str(model))
+    num_ctx = getattr(model, "num_ctx", None)
+    key = llm_cache_key(model_name, prompt, temperature, num_ctx)
+    response = llm_cache.get(key)
+    if response is None:
+        response = invoke_llm(model, prompt, temperature)
+        llm_cache.put(key, model_name, temperature, num_ctx, response)
+    return response
+
+
+def log_llm_cache_stats():
+    """Logs the hit rate of the LLM response cache."""
+    stats = llm_cache.get_stats()
+    logger.info(
+        f"LLM cache: {stats['hits']} hits / {stats['hits'] + stats['misses']} lookups "
+        f"({stats['hit_rate']:.0%}), {stats['entries']} responses ({stats['bytes'] / 1e6:.1f} MB)"
+    )
+    return stats
+
+
+# Global instance
+llm_cache = LLMCache(
+    CACHE_PATH,
+    max_entries=int(config.get("llm_cache_max_entries", 10000)),
+    max_bytes=int(float(config.get("llm_cache_max_mb", 200)) * 1024**2),
+)
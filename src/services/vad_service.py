@@ -0,0 +1,209 @@
+import os, sys
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config import config
+
+
+def frame_features(samples, frame_length):
+    """
+    Computes the RMS energy and the zero-crossing rate of non-overlapping frames.
+
+    Args:
+        samples (numpy.ndarray): float32 mono samples (the trailing partial frame is ignored).
+        frame_length (int): Number of samples per frame.
+
+    Returns:
+        tuple: (rms, zcr) arrays with one value per frame.
+    """
+    count = len(samples) // frame_length
+    frames = samples[:count * frame_length].reshape(count, frame_length)
+
+    rms = np.sqrt(np.einsum("ij,ij->i", frames, frames, dtype=np.float32) / frame_length)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_length
+    return rms, zcr
+
+
+def relative_energy_threshold(rms, ratio=None, silence_rms=None):
+    """
+    Energy threshold of a block relative to its own levels, for audio that is not normalised.
+
+    The noise floor (10th percentile of the frame energies) and the peak (99th percentile, so
+    a few clicks do not count) are measured, and the threshold is placed at ratio of the way
+    from the floor to the peak, never under silence_rms.
+
+    Args:
+        rms (numpy.ndarray): RMS energy of each frame of the block.
+        ratio (float, optional): Position of the threshold between floor and peak (config "vad_relative_threshold").
+        silence_rms (float, optional): Lowest threshold (config "vad_silence_rms").
+
+    Returns:
+        float: The RMS threshold of the block.
+    """
+    ratio = config.get("vad_relative_threshold", 0.1) if ratio is None else ratio
+    silence_rms = config.get("vad_silence_rms", 0.001) if silence_rms is None else silence_rms
+    if len(rms) == 0:
+        return silence_rms
+    noise_floor, peak = np.percentile(rms, [10, 99])
+    return max(float(noise_floor + ratio * (peak - noise_floor)), silence_rms)
+
+
+def speech_frames(samples, frame_length, energy_threshold=None, zcr_max=None):
+    """
+    Lightweight voice activity detection on non-overlapping frames (energy + zero-crossing rate).
+
+    A frame is speech when its RMS energy is above energy_threshold and its zero-crossing
+    rate is under zcr_max (noise and hiss cross zero much more often than voiced speech).
+    Loud frames are kept whatever their zero-crossing rate.
+
+    Args:
+        samples (numpy.ndarray): float32 mono samples (the trailing partial frame is ignored).
+        frame_length (int): Number of samples per frame.
+        energy_threshold (float or str, optional): RMS threshold (config "vad_energy_threshold"),
+            or "relative" for a threshold relative to the levels of samples (see relative_energy_threshold).
+        zcr_max (float, optional): Maximum zero-crossing rate of speech (config "vad_zcr_max").
+
+    Returns:
+        numpy.ndarray: One boolean per frame, True for speech.
+    """
+    energy_threshold = config.get("vad_energy_threshold", 0.01) if energy_threshold is None else energy_threshold
+    zcr_max = config.get("vad_zcr_max", 0.25) if zcr_max is None else zcr_max
+
+    rms, zcr = frame_features(samples, frame_length)
+    if energy_threshold == "relative":
+        energy_threshold = relative_energy_threshold(rms)
+
+    return (rms > energy_threshold) & ((zcr < zcr_max) | (rms > 4 * energy_threshold))
+
+
+def is_silent(samples, sample_rate=16000, frame_ms=30, silence_rms=None):
+    """
+    Tells whether an audio is silent: no frame louder than silence_rms (config "vad_silence_rms").
+
+    Args:
+        samples (numpy.ndarray): float32 mono samples.
+        sample_rate (int, optional): Sample rate of the audio. Defaults to 16000.
+        frame_ms (int, optional): Length of the frames in milliseconds. Defaults to 30.
+        silence_rms (float, optional): RMS level under which a frame is silent.
+
+    Returns:
+        bool: True when the whole audio is silent.
+    """
+    silence_rms = config.get("vad_silence_rms", 0.001) if silence_rms is None else silence_rms
+    rms, _ = frame_features(samples, int(sample_rate * frame_ms / 1000))
+    return not len(rms) or float(rms.max()) <= silence_rms
+
+
+def speech_regions(samples, sample_rate=16000, frame_ms=30, min_speech_s=None, min_silence_s=None, pad_s=None):
+    """
+    Finds the speech regions of an audio with the frame VAD.
+
+    The energy threshold is relative to the levels of the audio (its noise floor and peak), since
+    the file audio is not normalised. Silences shorter than min_silence_s are absorbed in the
+    surrounding speech, regions shorter than min_speech_s are dropped, and the remaining regions
+    are padded by pad_s on each side.
+
+    Args:
+        samples (numpy.ndarray): float32 mono samples.
+        sample_rate (int, optional): Sample rate of the audio. Defaults to 16000.
+        frame_ms (int, optional): Length of the VAD frames in milliseconds. Defaults to 30.
+        min_speech_s (float, optional): Minimum length of a region (config "vad_min_speech_s").
+        min_silence_s (float, optional): Minimum length of a silence between regions (config "vad_min_silence_s").
+        pad_s (float, optional): Padding added around each region (config "vad_pad_s").
+
+    Returns:
+        list: Speech regions (start, end) as sample positions, sorted and non-overlapping.
+    """
+    min_speech_s = config.get("vad_min_speech_s", 0.25) if min_speech_s is None else min_speech_s
+    min_silence_s = config.get("vad_min_silence_s", 0.5) if min_silence_s is None else min_silence_s
+    pad_s = config.get("vad_pad_s", 0.2) if pad_s is None else pad_s
+
+    frame_length = int(sample_rate * frame_ms / 1000)
+    speech = speech_frames(samples, frame_length, energy_threshold="relative")
+    if not speech.any():
+        return []
+
+    # Start / end frames of each run of speech frames
+    edges = np.diff(np.concatenate(([False], speech, [False])).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # Absorb the short silences
+    gaps = starts[1:] - ends[:-1]
+    keep = np.concatenate(([True], gaps * frame_length >= min_silence_s * sample_rate))
+    starts = starts[keep]
+    ends = np.concatenate((ends[:-1][keep[1:]], ends[-1:]))
+
+    # Drop the short regions
+    long_enough = (ends - starts) * frame_length >= min_speech_s * sample_rate
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    pad = int(pad_s * sample_rate)
+    regions = []
+    for start, end in zip(starts * frame_length - pad, ends * frame_length + pad):
+        start, end = max(0, int(start)), min(len(samples), int(end))
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def pause_cut(samples, sample_rate=16000, search_s=None):
+    """
+    Finds where to cut an audio so that no word is split: in the last pause of its last search_s seconds.
+
+    Args:
+        samples (numpy.ndarray): float32 mono samples.
+        sample_rate (int, optional): Sample rate of the audio. Defaults to 16000.
+        search_s (float, optional): Duration searched before the end (config "file_block_pause_search_s").
+
+    Returns:
+        int: Position of the cut, len(samples) when the end has no pause.
+    """
+    search_s = config.get("file_block_pause_search_s", 30.0) if search_s is None else search_s
+    tail_start = max(0, len(samples) - int(search_s * sample_rate))
+    regions = speech_regions(samples[tail_start:], sample_rate)
+    tail_length = len(samples) - tail_start
+
+    if not regions:
+        return len(samples)  # silent end
+    if regions[-1][1] < tail_length:
+        # Middle of the silence after the last region
+        return tail_start + (regions[-1][1] + tail_length) // 2
+    if len(regions) > 1:
+        # Middle of the pause before the region running up to the end
+        return tail_start + (regions[-2][1] + regions[-1][0]) // 2
+    return len(samples)
+
+
+def split_at_pauses(blocks, sample_rate=16000, search_s=None):
+    """
+    Moves the boundaries of consecutive audio blocks to the nearest pause before them.
+
+    The end of each block after its last pause is carried into the next block, so a word
+    spanning a boundary is transcribed in one piece. A block is only cut once the next one
+    is read (the last block is kept whole), so two blocks are held in memory.
+
+    Args:
+        blocks (iterable): Consecutive float32 mono blocks (e.g. iter_audio_blocks). The blocks
+            may be views on a reused buffer, they are copied.
+        sample_rate (int, optional): Sample rate of the audio. Defaults to 16000.
+        search_s (float, optional): Duration searched for a pause before each boundary.
+
+    Yields:
+        tuple: (position of the block in the audio in samples, float32 samples of the block).
+    """
+    pending = None
+    offset = 0
+    for block in blocks:
+        if pending is None:
+            pending = np.array(block, dtype=np.float32)
+            continue
+        cut = pause_cut(pending, sample_rate, search_s)
+        yield offset, pending[:cut]
+        offset += cut
+        pending = np.concatenate((pending[cut:], block))
+    if pending is not None and len(pending):
+        yield offset, pending
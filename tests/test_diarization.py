@@ -0,0 +1,130 @@
+import importlib
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+SAMPLE_RATE = 16000
+
+
+class FakeTurn:
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+
+class FakeDiarization:
+    """Stands for the pyannote Annotation returned by the pipeline."""
+
+    def __init__(self, turns):
+        self.turns = turns
+
+    def itertracks(self, yield_label=False):
+        for start, end, speaker in self.turns:
+            yield FakeTurn(start, end), None, speaker
+
+
+class FakePipeline:
+    """Fake pyannote pipeline, records the waveform it was called with."""
+
+    def __init__(self, turns):
+        self.turns = turns
+        self.calls = []
+
+    def __call__(self, inputs):
+        self.calls.append(inputs)
+        return FakeDiarization(self.turns)
+
+
+def fake_module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+@pytest.fixture
+def diarization(monkeypatch):
+    """Imports diarization.diarization with the heavy dependencies (torch, pyannote, models) faked."""
+    pipeline = FakePipeline([(0.0, 1.5, "SPEAKER_00"), (2.0, 4.0, "SPEAKER_01")])
+    asr_calls = {"batch": [], "words": []}
+
+    @contextmanager
+    def use_pyannote():
+        yield pipeline
+
+    @contextmanager
+    def use_model():
+        yield "model", "processor", "float32", "cpu"
+
+    def transcribe_batch(waveforms, model, processor, torch_dtype, device, lang_code=None, batch_size=8):
+        asr_calls["batch"].append(waveforms)
+        return [{"text": f"{len(waveform) / SAMPLE_RATE:.1f}s"} for waveform in waveforms]
+
+    def transcribe_words(waveform, model, processor, torch_dtype, device, lang_code=None):
+        asr_calls["words"].append(waveform)
+        return {"chunks": [
+            {"text": " bonjour", "timestamp": (0.2, 0.8)},
+            {"text": " à tous", "timestamp": (0.9, 1.4)},
+            {"text": " merci", "timestamp": (2.5, 3.0)},
+        ]}
+
+    logger = fake_module("logger", debug=lambda *a, **k: None, info=lambda *a, **k: None,
+                         warning=lambda *a, **k: None, error=lambda *a, **k: None)
+    pyannote_audio = fake_module("pyannote.audio", __version__="test")
+    fakes = {
+        "torch": fake_module("torch", from_numpy=lambda array: types.SimpleNamespace(unsqueeze=lambda dim: array[None])),
+        "pyannote": fake_module("pyannote", audio=pyannote_audio),
+        "pyannote.audio": pyannote_audio,
+        "pyannote.core": fake_module("pyannote.core", Annotation=object, Segment=object),
+        "core": fake_module("core", transcribe_batch=transcribe_batch, transcribe_words=transcribe_words,
+                            use_model=use_model, use_pyannote=use_pyannote),
+        "core.model_loader": fake_module("core.model_loader", PYANNOTE_MODEL="pyannote/speaker-diarization-3.1"),
+        "services": fake_module("services", logger=logger, process_audio_for_whisper=lambda waveform, rate: waveform,
+                                get_decoded_audio=None, save_transcriptions=None, cleanup_transcriptions=None,
+                                transcription_post_process=None),
+    }
+    for name, module in fakes.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    for name in [name for name in sys.modules if name == "diarization" or name.startswith("diarization.")]:
+        monkeypatch.delitem(sys.modules, name)
+
+    module = importlib.import_module("diarization.diarization")
+    monkeypatch.setattr(module, "load_cached_diarization", lambda key: None)
+    monkeypatch.setattr(module, "save_diarization", lambda key, diarization: None)
+    yield module, pipeline, asr_calls
+
+    for name in [name for name in sys.modules if name == "diarization" or name.startswith("diarization.")]:
+        del sys.modules[name]
+
+
+def test_transcribe_turns(diarization):
+    module, pipeline, asr_calls = diarization
+    audio = np.linspace(-1.0, 1.0, 4 * SAMPLE_RATE, dtype=np.float32)
+
+    segments = module.transcribe_turns(audio, len(audio) / SAMPLE_RATE, "fr")
+
+    assert len(pipeline.calls) == 1
+    assert pipeline.calls[0]["sample_rate"] == SAMPLE_RATE
+    assert [len(waveform) for waveform in asr_calls["batch"][0]] == [int(1.5 * SAMPLE_RATE), 2 * SAMPLE_RATE]
+    assert segments == [
+        {"speaker": "SPEAKER_00", "start": 0.0, "end": 1.5, "transcription": "1.5s"},
+        {"speaker": "SPEAKER_01", "start": 2.0, "end": 4.0, "transcription": "2.0s"},
+    ]
+
+
+def test_transcribe_aligned(diarization):
+    module, pipeline, asr_calls = diarization
+    audio = np.zeros(4 * SAMPLE_RATE, dtype=np.float32)
+
+    segments = module.transcribe_aligned(audio, "fr")
+
+    assert len(pipeline.calls) == 1
+    assert len(asr_calls["words"]) == 1 and len(asr_calls["words"][0]) == len(audio)
+    assert [segment["speaker"] for segment in segments] == ["SPEAKER_00", "SPEAKER_01"]
+    assert segments[0]["transcription"].strip() == "bonjour à tous"
+    assert segments[1]["transcription"].strip() == "merci"
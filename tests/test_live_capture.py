@@ -0,0 +1,89 @@
+import importlib
+import importlib.util
+import io
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, SRC_DIR)
+
+SAMPLE_RATE = 16000
+
+
+def fake_module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+def pcm_stream(samples):
+    """16-bit PCM stream of float samples, like the ffmpeg output."""
+    return io.BytesIO((np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+
+
+@pytest.fixture
+def live(monkeypatch):
+    """Imports live.STT_live with the model, dotenv and the output services faked (the VAD is the real one)."""
+    spec = importlib.util.spec_from_file_location("vad_service", os.path.join(SRC_DIR, "services", "vad_service.py"))
+    vad_service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(vad_service)
+
+    logger = fake_module("logger", debug=lambda *a, **k: None, info=lambda *a, **k: None,
+                         warning=lambda *a, **k: None, error=lambda *a, **k: None)
+    fakes = {
+        "dotenv": fake_module("dotenv", load_dotenv=lambda *a, **k: None),
+        "core": fake_module("core", do_transcription=None, transcribe_words=None, use_model=None),
+        "services": fake_module("services", create_output_file=None, start_post_process=None,
+                                write_in_output_formated=None, logger=logger, EventWriter=lambda stream: None,
+                                decode_command=None, speech_frames=vad_service.speech_frames),
+    }
+    for name, module in fakes.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    for name in [name for name in sys.modules if name == "live" or name.startswith("live.")]:
+        monkeypatch.delitem(sys.modules, name)
+
+    yield importlib.import_module("live.STT_live")
+
+    for name in [name for name in sys.modules if name == "live" or name.startswith("live.")]:
+        del sys.modules[name]
+
+
+def captured_windows(live, samples):
+    """Runs capture_audio in VAD mode on the samples and returns the queued windows (start, end)."""
+    segmenter = live.VadSegmenter(SAMPLE_RATE, min_window_s=1.0, max_window_s=6.0, pause_s=0.3, fixed_window_s=1.5)
+    window_queue = live.WindowQueue(maxsize=16, window_capacity=7 * SAMPLE_RATE)
+    live.capture_audio(pcm_stream(samples), window_queue, int(1.5 * SAMPLE_RATE), 0, 4096, segmenter)
+
+    windows = []
+    while (window := window_queue.get()) is not None:
+        windows.append((window.start, window.end))
+        window_queue.release(window)
+    return windows
+
+
+def test_vad_speech_up_to_end_of_stream(live):
+    t = np.arange(10 * SAMPLE_RATE) / SAMPLE_RATE
+    samples = np.where(t >= 6.0, 0.3 * np.sin(2 * np.pi * 180 * t), 0.0).astype(np.float32)
+
+    windows = captured_windows(live, samples)
+
+    # The utterance still in progress at the end of the stream is queued, up to its last sample
+    assert windows
+    assert windows[-1][1] == len(samples)
+    assert windows[-1][0] <= 6 * SAMPLE_RATE
+    assert sum(end - start for start, end in windows if end > 6 * SAMPLE_RATE) >= 4 * SAMPLE_RATE - 4096
+
+
+def test_vad_silent_end_of_stream(live):
+    t = np.arange(4 * SAMPLE_RATE) / SAMPLE_RATE
+    samples = np.where(t < 1.0, 0.3 * np.sin(2 * np.pi * 180 * t), 0.0).astype(np.float32)
+
+    windows = captured_windows(live, samples)
+
+    # Only the speech window is sent, the trailing silence is not
+    assert len(windows) == 1
+    assert windows[0][0] == 0 and windows[0][1] < 2 * SAMPLE_RATE
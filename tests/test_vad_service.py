@@ -0,0 +1,53 @@
+import importlib.util
+import os
+import sys
+
+import numpy as np
+import pytest
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, SRC_DIR)
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture(scope="module")
+def vad_service():
+    """Loads services/vad_service.py alone (the services package imports the decoders and the LLM client)."""
+    spec = importlib.util.spec_from_file_location("vad_service", os.path.join(SRC_DIR, "services", "vad_service.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def utterances(duration_s, speech):
+    """Sine "speech" on the (start, end) intervals given in seconds, silence elsewhere."""
+    t = np.arange(int(duration_s * SAMPLE_RATE)) / SAMPLE_RATE
+    samples = np.zeros(len(t), dtype=np.float32)
+    for start, end in speech:
+        inside = (t >= start) & (t < end)
+        samples[inside] = 0.3 * np.sin(2 * np.pi * 180 * t[inside])
+    return samples
+
+
+def test_split_at_pauses_moves_the_boundary_to_a_pause(vad_service):
+    # A word runs over the 10 s block boundary, the pause before it is at 7-8 s
+    samples = utterances(20, [(1, 7), (8, 12), (13, 19)])
+    blocks = [samples[i:i + 10 * SAMPLE_RATE] for i in range(0, len(samples), 10 * SAMPLE_RATE)]
+
+    split = list(vad_service.split_at_pauses(blocks, SAMPLE_RATE, search_s=5))
+
+    first_end = len(split[0][1])
+    assert 7 * SAMPLE_RATE <= first_end <= 8 * SAMPLE_RATE
+    # The blocks are contiguous and cover the whole audio
+    assert [start for start, _ in split] == [0, first_end]
+    np.testing.assert_array_equal(np.concatenate([block for _, block in split]), samples)
+
+
+def test_split_at_pauses_keeps_the_boundary_without_pause(vad_service):
+    samples = utterances(20, [(0, 20)])
+    blocks = [samples[i:i + 10 * SAMPLE_RATE] for i in range(0, len(samples), 10 * SAMPLE_RATE)]
+
+    split = list(vad_service.split_at_pauses(blocks, SAMPLE_RATE, search_s=5))
+
+    assert [(start, len(block)) for start, block in split] == [(0, 10 * SAMPLE_RATE), (10 * SAMPLE_RATE, 10 * SAMPLE_RATE)]